@@ -0,0 +1,79 @@
+import hashlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_GET
+
+from .models import News
+from .pagination import paginate_comments
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def home_news():
+    return News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+def news_list_etag(request):
+    """Версия ленты: id и updated новостей с главной."""
+    return make_etag(*home_news().values_list('pk', 'updated'))
+
+
+def comments_etag(request, pk):
+    """Версия обсуждения: News.updated сдвигается при любом комментарии."""
+    updated = News.objects.filter(pk=pk).values_list(
+        'updated', flat=True
+    ).first()
+    if updated is None:
+        return None
+    return make_etag(pk, updated.isoformat(), request.GET.get('cursor'))
+
+
+def serialize_news(news):
+    return {
+        'id': news.pk,
+        'title': news.title,
+        'text': news.text,
+        'date': news.date,
+        'comment_count': news.comment_count,
+        'comments_url': reverse('news:api-comments', args=[news.pk]),
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+        'updated': comment.updated,
+    }
+
+
+@require_GET
+@condition(etag_func=news_list_etag)
+def news_list(request):
+    """Новости с главной страницы в JSON."""
+    return JsonResponse(
+        {'results': [serialize_news(news) for news in home_news()]}
+    )
+
+
+@require_GET
+@condition(etag_func=comments_etag)
+def news_comments(request, pk):
+    """Страница комментариев к новости в JSON, с курсором на следующую."""
+    news = get_object_or_404(News, pk=pk)
+    comments, next_cursor = paginate_comments(
+        news.comment_set.select_related('author'),
+        settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        request.GET.get('cursor'),
+    )
+    return JsonResponse({
+        'results': [serialize_comment(comment) for comment in comments],
+        'next_cursor': next_cursor,
+    })
@@ -1,7 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from yanews.db import configure_sqlite
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .forms import bad_words
+
+        bad_words.load()
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='configure_sqlite'
+        )
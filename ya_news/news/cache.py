@@ -0,0 +1,136 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from yanews.metrics import registry
+
+HOME_GROUP = 'home'
+VERSION_KEY = 'news:page-version:{group}'
+PAGE_KEY = 'news:page:{group}:{version}:{path}'
+COMMENT_KEY = 'news:comment:{pk}:{version}'
+COMMENT_TEMPLATE = 'news/includes/comment.html'
+
+
+def news_group(news_id):
+    """Группа страниц, зависящих от одной новости."""
+    return f'news-{news_id}'
+
+
+def get_group_version(group):
+    version = cache.get(VERSION_KEY.format(group=group))
+    if version is None:
+        version = bump_group_version(group)
+    return version
+
+
+def bump_group_version(group):
+    """
+    Делает недоступными все закэшированные страницы группы.
+
+    Версия — случайная строка, а не счётчик: если ключ версии вытеснят
+    из кэша, новая версия не совпадёт ни с одной из старых.
+    """
+    version = uuid4().hex
+    cache.set(VERSION_KEY.format(group=group), version, None)
+    return version
+
+
+async def aget_group_version(group):
+    """Асинхронная версия get_group_version."""
+    version = await cache.aget(VERSION_KEY.format(group=group))
+    if version is None:
+        version = uuid4().hex
+        await cache.aset(VERSION_KEY.format(group=group), version, None)
+    return version
+
+
+def page_cache_key(group, path, version=None):
+    return PAGE_KEY.format(
+        group=group,
+        version=version or get_group_version(group),
+        path=hashlib.md5(path.encode()).hexdigest(),
+    )
+
+
+async def apage_cache_key(group, path):
+    return page_cache_key(group, path, await aget_group_version(group))
+
+
+def count_page_lookup(response):
+    registry.inc(
+        'cache_requests_total',
+        cache='page',
+        result='miss' if response is None else 'hit',
+    )
+    return response
+
+
+def get_page(key):
+    return count_page_lookup(cache.get(key))
+
+
+async def aget_page(key):
+    return count_page_lookup(await cache.aget(key))
+
+
+def store_page(key, response):
+    cache.set(key, response, settings.NEWS_PAGE_CACHE_TIMEOUT)
+
+
+def invalidate_news_pages(news_id, home=True):
+    """Сбрасывает страницу новости и, при необходимости, главную."""
+    bump_group_version(news_group(news_id))
+    if home:
+        bump_group_version(HOME_GROUP)
+
+
+def invalidate_all_pages(news_ids):
+    """Сбрасывает главную и страницы всех новостей одним set_many."""
+    cache.set_many({
+        VERSION_KEY.format(group=group): uuid4().hex
+        for group in [HOME_GROUP, *map(news_group, news_ids)]
+    }, None)
+
+
+def comment_fragment_key(comment):
+    """Ключ меняется при каждом редактировании комментария."""
+    return COMMENT_KEY.format(
+        pk=comment.pk, version=comment.updated.timestamp()
+    )
+
+
+def attach_comment_fragments(comments):
+    """
+    Добавляет комментариям готовый HTML в атрибут rendered.
+
+    Закэшированные фрагменты достаются одним get_many, шаблон
+    рендерится только для отсутствующих в кэше. Ссылки
+    редактирования зависят от пользователя и во фрагмент не входят.
+    """
+    keys = {comment_fragment_key(comment): comment for comment in comments}
+    fragments = cache.get_many(keys)
+    registry.inc(
+        'cache_requests_total', len(fragments),
+        cache='comment', result='hit',
+    )
+    registry.inc(
+        'cache_requests_total', len(keys) - len(fragments),
+        cache='comment', result='miss',
+    )
+    missing = {
+        key: render_to_string(COMMENT_TEMPLATE, {'comment': comment})
+        for key, comment in keys.items()
+        if key not in fragments
+    }
+    if missing:
+        cache.set_many(
+            missing, settings.NEWS_COMMENT_FRAGMENT_CACHE_TIMEOUT
+        )
+        fragments.update(missing)
+    for key, comment in keys.items():
+        comment.rendered = mark_safe(fragments[key])
+    return comments
@@ -0,0 +1,163 @@
+"""
+Рассылка новых комментариев читателям страницы новости.
+
+Комментарии публикуются в канал новости через брокер из настройки
+NEWS_EVENTS_BROKER. LocalBroker раздаёт их подписчикам своего процесса;
+при нескольких воркерах его заменяют брокером с тем же интерфейсом:
+publish(channel, message) и асинхронный контекстный менеджер
+subscribe(channel), который отдаёт объект с корутиной get(timeout).
+"""
+import asyncio
+import functools
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import cache as page_cache
+from .models import Comment
+
+# Через сколько миллисекунд браузер переподключается после обрыва.
+RETRY_MS = 3000
+
+
+class SubscriptionClosed(Exception):
+    """Подписчик не успевал читать, и часть сообщений потеряна."""
+
+
+class Subscription:
+    """Очередь сообщений одного подписчика в его цикле событий."""
+
+    def __init__(self, maxsize):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Следующее сообщение или None, если за timeout секунд их не было."""
+        if self.overflowed:
+            raise SubscriptionClosed
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """
+    Брокер внутри процесса.
+
+    Публиковать можно из любого потока: сообщение передаётся в цикл
+    событий подписчика через call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, message
+                )
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт.
+                pass
+
+    def subscribers(self, channel):
+        with self.lock:
+            return len(self.channels.get(channel, ()))
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = Subscription(settings.NEWS_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                self.channels[channel].discard(subscription)
+                if not self.channels[channel]:
+                    del self.channels[channel]
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.NEWS_EVENTS_BROKER)()
+
+
+def comments_channel(news_id):
+    return f'news:{news_id}:comments'
+
+
+def comment_message(comment):
+    comment = page_cache.attach_comment_fragments([comment])[0]
+    return {'id': comment.pk, 'html': str(comment.rendered)}
+
+
+def publish_comment(comment):
+    """Отправляет новый комментарий всем читателям его новости."""
+    get_broker().publish(
+        comments_channel(comment.news_id), comment_message(comment)
+    )
+
+
+def format_event(message):
+    data = json.dumps(message, ensure_ascii=False)
+    return f'id: {message["id"]}\nevent: comment\ndata: {data}\n\n'
+
+
+async def missed_comments(news_id, last_id):
+    """Комментарии, появившиеся, пока читатель был отключён."""
+    comments = [
+        comment async for comment in Comment.objects.filter(
+            news_id=news_id, pk__gt=last_id
+        ).select_related('author').order_by('pk')
+    ]
+    return await sync_to_async(
+        lambda: [comment_message(comment) for comment in comments]
+    )()
+
+
+async def comment_events(news_id, last_id=None):
+    """
+    Поток server-sent events с новыми комментариями к новости.
+
+    Подписка оформляется до чтения пропущенных комментариев, поэтому
+    между ними ничего не теряется, а повторы отсекаются по id.
+    Если подписчик переполнил очередь, поток закрывается: браузер
+    переподключится с Last-Event-ID и получит пропущенное из БД.
+    """
+    async with get_broker().subscribe(
+        comments_channel(news_id)
+    ) as subscription:
+        yield f'retry: {RETRY_MS}\n\n'
+        if last_id is not None:
+            for message in await missed_comments(news_id, last_id):
+                yield format_event(message)
+                last_id = message['id']
+        while True:
+            try:
+                message = await subscription.get(
+                    settings.NEWS_EVENTS_KEEPALIVE
+                )
+            except SubscriptionClosed:
+                return
+            if message is None:
+                yield ': keepalive\n\n'
+            elif last_id is None or message['id'] > last_id:
+                yield format_event(message)
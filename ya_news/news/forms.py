@@ -2,6 +2,7 @@ from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
 from .models import Comment
+from .moderation import BadWordRegistry
 
 BAD_WORDS = (
     'редиска',
@@ -10,6 +11,8 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = BadWordRegistry(BAD_WORDS)
+
 
 class CommentForm(ModelForm):
 
@@ -20,8 +23,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words.find(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from news.models import News
+from yanews.loadtest import login, run_load
+
+MODES = {'sync': '0', 'async': '1'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки синхронных и '
+        'асинхронных версий главной страницы и страницы новости под ASGI. '
+        'Каждый режим прогоняется в отдельном процессе на текущей БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=50,
+            help='Число одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Общее число запросов в прогоне.',
+        )
+        parser.add_argument(
+            '--username',
+            help=(
+                'Запросы от имени пользователя. Анонимам страницы '
+                'отдаются из кэша.'
+            ),
+        )
+        parser.add_argument(
+            '--mode', choices=MODES,
+            help='Прогнать только один режим и вывести результат в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+        for mode, flag in MODES.items():
+            command = [
+                sys.executable, sys.argv[0], 'bench_async_views',
+                '--mode', mode,
+                '--clients', str(options['clients']),
+                '--requests', str(options['requests']),
+            ]
+            if options['username']:
+                command += ['--username', options['username']]
+            child = subprocess.run(
+                command, env={**os.environ, 'NEWS_ASYNC_VIEWS': flag},
+                capture_output=True, text=True,
+            )
+            if child.returncode:
+                raise CommandError(child.stderr)
+            result = json.loads(child.stdout.splitlines()[-1])
+            self.stdout.write(
+                f'{mode}: {result["rps"]:.0f} запросов/с, '
+                f'p50 {result["p50"]:.1f} мс, p99 {result["p99"]:.1f} мс, '
+                f'ошибок {result["errors"]} из {result["requests"]}'
+            )
+
+    def run_mode(self, options):
+        pks = list(News.objects.values_list('pk', flat=True)[:10])
+        if not pks:
+            raise CommandError('В базе нет новостей.')
+        paths = [reverse('news:home')] + [
+            reverse('news:detail', args=[pk]) for pk in pks
+        ]
+        client, headers = None, []
+        if options['username']:
+            client, headers = login(options['username'])
+        app = get_asgi_application()
+        try:
+            asyncio.run(run_load(
+                app, paths, options['clients'], options['clients'], headers
+            ))
+            return asyncio.run(run_load(
+                app, paths, options['clients'], options['requests'], headers
+            ))
+        finally:
+            if client is not None:
+                client.logout()
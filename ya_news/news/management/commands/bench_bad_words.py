@@ -0,0 +1,52 @@
+import random
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import WordMatcher
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def substring_check(words, text):
+    """Проверка до перехода на автомат: поиск каждого слова по очереди."""
+    return any(word in text for word in words)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время проверки комментария на запрещённые слова '
+        'поиском подстрок и автоматом Ахо — Корасик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 1000, 10000],
+            help='Размеры словаря.',
+        )
+        parser.add_argument(
+            '--text-length', type=int, default=2000,
+            help='Длина проверяемого комментария в символах.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        text = ''.join(
+            rng.choice(ALPHABET + ' ') for _ in range(options['text_length'])
+        )
+        for size in options['sizes']:
+            words = [
+                ''.join(rng.choices(ALPHABET, k=rng.randint(6, 10)))
+                for _ in range(size)
+            ]
+            matcher = WordMatcher(words)
+            repeat = options['repeat']
+            before = timeit(
+                lambda: substring_check(words, text), number=repeat
+            ) / repeat
+            after = timeit(lambda: matcher.find(text), number=repeat) / repeat
+            self.stdout.write(
+                f'{size} слов: подстроки {before * 1000:.2f} мс, '
+                f'автомат {after * 1000:.2f} мс'
+            )
@@ -0,0 +1,81 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from news.cache import attach_comment_fragments
+from news.models import Comment, News
+
+# Разметка комментария до кэширования фрагментов: всё рендерится
+# заново для каждого комментария на каждый запрос.
+LEGACY_TEMPLATE = Template('''
+{% for comment in comments %}
+  <div>
+    <b>{{ comment.author }}</b>, {{ comment.created }}</b>
+    <p class="mb-0">{{ comment.text|linebreaksbr }}</p>
+    {% if comment.author == user %}
+      <a href="{% url 'news:edit' comment.pk %}">Редактировать</a> |
+      <a href="{% url 'news:delete' comment.pk %}">Удалить</a>
+    {% endif %}
+  </div>
+  <br>
+{% endfor %}
+''')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга ветки комментариев без кэша '
+        'фрагментов и с ним. База данных не используется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000, 10000],
+            help='Размеры веток комментариев.',
+        )
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            comments = self.make_comments(size)
+            cache.clear()
+            legacy = self.measure(lambda: LEGACY_TEMPLATE.render(Context(
+                {'comments': comments, 'user': AnonymousUser()}
+            )))
+            cold = self.measure(lambda: self.render_cached(comments))
+            warm = self.measure(lambda: self.render_cached(comments))
+            self.stdout.write(
+                f'{size} комментариев: без кэша {legacy:.3f} с, '
+                f'кэш пуст {cold:.3f} с, кэш заполнен {warm:.3f} с'
+            )
+
+    @staticmethod
+    def make_comments(size):
+        news = News(pk=1, title='Новость', text='Текст')
+        author = get_user_model()(pk=1, username='author')
+        now = timezone.now()
+        return [
+            Comment(
+                pk=index, news=news, author=author, created=now, updated=now,
+                text=f'Комментарий {index}\nвторая строка',
+            )
+            for index in range(1, size + 1)
+        ]
+
+    @staticmethod
+    def render_cached(comments):
+        return render_to_string('news/comments.html', {
+            'comments': attach_comment_fragments(comments),
+            'user': AnonymousUser(),
+        })
+
+    @staticmethod
+    def measure(func):
+        started = perf_counter()
+        func()
+        return perf_counter() - started
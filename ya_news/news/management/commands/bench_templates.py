@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from news.models import News
+from yanews.templating import CACHED_LOADERS, FILE_LOADERS, measure_render
+
+TEMPLATE = 'news/home.html'
+MODES = (
+    ('без кэша', FILE_LOADERS, False),
+    ('кэширующий загрузчик', CACHED_LOADERS, False),
+    ('кэш и предзагрузка', CACHED_LOADERS, True),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        f'Сравнивает время рендеринга {TEMPLATE} с загрузкой шаблонов '
+        'с диска, с кэширующим загрузчиком и с предзагрузкой. '
+        'База данных не используется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=1000,
+            help='Число рендерингов после первого.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        context = {
+            'object_list': [
+                News(
+                    pk=index, title=f'Новость {index}', text='Текст ' * 50,
+                    date=now.date(), comment_count=index,
+                )
+                for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+            ],
+            'user': AnonymousUser(),
+        }
+        # Прогрев: импорт тегов и URLconf не должен достаться первому режиму.
+        measure_render(TEMPLATE, context, FILE_LOADERS, 1)
+        for mode, loaders, preload in MODES:
+            first, mean = measure_render(
+                TEMPLATE, context, loaders, options['repeat'], preload
+            )
+            self.stdout.write(
+                f'{mode}: первый рендеринг {first * 1000:.2f} мс, '
+                f'далее {mean * 1000:.3f} мс'
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс новостей (только SQLite).'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Индекс FTS5 есть только на SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')"
+            )
+        self.stdout.write('Индекс новостей пересобран.')
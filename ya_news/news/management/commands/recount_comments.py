@@ -0,0 +1,54 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from news.cache import HOME_GROUP, bump_group_version, news_group
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, сколько счётчиков расходится.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Вместе со счётчиком сдвигается News.updated (источник ETag API),
+        а после фиксации сбрасываются закэшированные страницы
+        исправленных новостей и главная.
+        """
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        actual = Coalesce(Subquery(counts), 0)
+        with transaction.atomic():
+            broken = News.objects.alias(actual=actual).exclude(
+                comment_count=actual
+            )
+            if options['dry_run']:
+                total = broken.count()
+            else:
+                fixed = list(broken.values_list('pk', flat=True))
+                total = News.objects.filter(pk__in=fixed).update(
+                    comment_count=actual, updated=timezone.now()
+                )
+                transaction.on_commit(partial(self.invalidate, fixed))
+        self.stdout.write(f'Расходящихся счётчиков: {total}')
+
+    @staticmethod
+    def invalidate(news_ids):
+        for news_id in news_ids:
+            bump_group_version(news_group(news_id))
+        if news_ids:
+            bump_group_version(HOME_GROUP)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from news.cache import invalidate_all_pages
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу default в реплики из DATABASE_REPLICAS. '
+        'Только для SQLite: так реплики готовят для локальной проверки.'
+    )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            target = connections[alias]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            self.stdout.write(f'{alias}: скопировано из {DEFAULT_DB_ALIAS}')
+        # Пока реплика отставала, анонимные страницы могли закэшироваться
+        # со старыми данными под уже новой версией.
+        invalidate_all_pages(
+            News.objects.using(DEFAULT_DB_ALIAS).values_list('pk', flat=True)
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    db_alias = schema_editor.connection.alias
+    counts = Comment.objects.using(db_alias).filter(
+        news=OuterRef('pk')
+    ).order_by().values('news').annotate(total=Count('pk')).values('total')
+    News.objects.using(db_alias).update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='news',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='news.news'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['news', 'created', 'id'], name='comment_news_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-date', 'id'], name='news_date_idx'),
+        ),
+    ]
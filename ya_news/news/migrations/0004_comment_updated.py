@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_news_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
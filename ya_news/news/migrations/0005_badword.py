@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100, unique=True, verbose_name='Слово')),
+            ],
+            options={
+                'verbose_name': 'Запрещённое слово',
+                'verbose_name_plural': 'Запрещённые слова',
+                'ordering': ('word',),
+            },
+        ),
+    ]
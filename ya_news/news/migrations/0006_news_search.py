@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Внешнее содержимое: FTS5 хранит только индекс, текст берётся
+# из news_news. Триггеры обновляют индекс при каждом изменении,
+# полная пересборка — команда rebuild_news_search.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE news_news_fts USING fts5(
+        title, text, content='news_news', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS news_news_fts_insert',
+    'DROP TRIGGER IF EXISTS news_news_fts_delete',
+    'DROP TRIGGER IF EXISTS news_news_fts_update',
+    'DROP TABLE IF EXISTS news_news_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_badword'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# SQLite пересоздаёт news_news при добавлении updated, и триггеры
+# индекса FTS5 из 0006_news_search пропадают вместе со старой таблицей.
+# Они создаются заново, индекс пересобирается.
+TRIGGERS_SQL = (
+    'DROP TRIGGER IF EXISTS news_news_fts_insert',
+    'DROP TRIGGER IF EXISTS news_news_fts_delete',
+    'DROP TRIGGER IF EXISTS news_news_fts_update',
+    """
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",
+)
+
+
+def recreate_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, recreate_search_triggers
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            recreate_search_triggers, migrations.RunPython.noop
+        ),
+    ]
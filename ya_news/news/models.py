@@ -8,9 +8,15 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Меняется при любом изменении новости или её комментариев.
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -21,7 +27,8 @@ class News(models.Model):
 class Comment(models.Model):
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -29,9 +36,30 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            # Покрывает и выборку по news_id, поэтому у ForeignKey
+            # отдельный индекс отключён.
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class BadWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
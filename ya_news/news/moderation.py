@@ -0,0 +1,208 @@
+import os
+import re
+import string
+import threading
+from collections import deque
+from time import monotonic
+
+from django.conf import settings
+
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = {
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'u': 'и', 'ё': 'е',
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а',
+}
+SEPARATORS = (
+    set(string.punctuation + string.digits + '«»—–…·•\u00ad\u200b')
+    - set(HOMOGLYPHS)
+)
+NORMALIZATION_TABLE = str.maketrans({
+    **HOMOGLYPHS, **dict.fromkeys(SEPARATORS)
+})
+# Слово, разбитое пробелами на отдельные буквы: «р е д и с к а».
+# Склеиваются только три буквы подряд и больше, чтобы не трогать
+# однобуквенные предлоги и союзы: «я и в кино».
+SPACED_LETTERS = re.compile(r'(?<!\w)\w(?:\s+\w(?!\w)){2,}')
+SPACES = re.compile(r'\s+')
+# Окончания, которые отбрасываются у слов словаря, чтобы ловить
+# другие падежи и числа. Сначала проверяются более длинные.
+ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ой', 'ей', 'ом', 'ем',
+    'ою', 'ею', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ы', 'и', 'а', 'я',
+    'о', 'е', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 4
+
+
+def normalize(text):
+    """
+    Приводит текст к виду, в котором ищутся запрещённые слова.
+
+    Регистр и похожие латинские буквы сводятся к кириллице,
+    разделители внутри слов удаляются, разбитые пробелами буквы
+    склеиваются. Все шаги линейны по длине текста.
+    """
+    text = text.lower().translate(NORMALIZATION_TABLE)
+    return SPACED_LETTERS.sub(
+        lambda match: SPACES.sub('', match.group()), text
+    )
+
+
+def stem(word):
+    """Отбрасывает окончание, если остаётся достаточно длинная основа."""
+    for ending in ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из слов в тексте.
+
+    Строится один раз, после чего проверка текста занимает время,
+    пропорциональное длине текста, и не зависит от размера словаря.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word in words:
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        if word:
+            self.output[state] = word
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self.transitions[state].items():
+                queue.append(target)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(char, 0)
+                if self.output[target] is None:
+                    self.output[target] = self.output[self.fail[target]]
+
+    def find(self, text):
+        """Возвращает первое найденное слово или None."""
+        transitions, fail, output = self.transitions, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+def read_words_file(path):
+    with open(path, encoding='utf-8') as words_file:
+        return [
+            line.strip().lower() for line in words_file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+def build_matcher(words):
+    return WordMatcher(stem(normalize(word)) for word in words)
+
+
+class BadWordRegistry:
+    """
+    Хранит автоматы для текущего словаря и пересобирает их при изменениях.
+
+    Встроенный список и файл NEWS_BAD_WORDS_FILE собираются в автомат
+    при запуске (см. NewsConfig.ready), слова модели BadWord — в отдельный
+    небольшой автомат при первой проверке. Слова нормализуются и сводятся
+    к основам один раз при сборке. Раз в NEWS_BAD_WORDS_RELOAD_INTERVAL
+    секунд проверяется mtime файла и перечитываются записи из БД, чтобы
+    правки из других процессов тоже подхватывались; в своём процессе
+    записи из БД сбрасываются по сигналу.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = default_words
+        self.lock = threading.Lock()
+        self.matcher = None
+        self.database_matcher = None
+        self.state = None
+        self.checked_at = 0
+
+    def find(self, text):
+        """Ищет запрещённое слово в нормализованном тексте."""
+        text = normalize(text)
+        matcher, database_matcher = self.get_matchers()
+        return matcher.find(text) or database_matcher.find(text)
+
+    def load(self):
+        """Собирает автомат встроенного списка и файла."""
+        with self.lock:
+            self._load()
+
+    def get_matchers(self):
+        if self.matcher is None:
+            self.load()
+        elif (
+            monotonic() - self.checked_at
+            > settings.NEWS_BAD_WORDS_RELOAD_INTERVAL
+        ):
+            with self.lock:
+                if self._file_state() != self.state:
+                    self._load()
+                self.checked_at = monotonic()
+                self.database_matcher = None
+        if self.database_matcher is None:
+            self.database_matcher = build_matcher(self.load_database_words())
+        return self.matcher, self.database_matcher
+
+    def reset(self):
+        """Сбрасывает слова из БД, они перечитаются при следующей проверке."""
+        self.database_matcher = None
+
+    def load_words(self):
+        words = {word.lower() for word in self.default_words}
+        path = settings.NEWS_BAD_WORDS_FILE
+        if path and os.path.exists(path):
+            words.update(read_words_file(path))
+        return sorted(words)
+
+    @staticmethod
+    def load_database_words():
+        from .models import BadWord
+
+        return sorted({
+            word.lower()
+            for word in BadWord.objects.values_list('word', flat=True)
+        })
+
+    def _load(self):
+        self.state = self._file_state()
+        self.matcher = build_matcher(self.load_words())
+        self.checked_at = monotonic()
+
+    @staticmethod
+    def _file_state():
+        path = settings.NEWS_BAD_WORDS_FILE
+        if path and os.path.exists(path):
+            return os.stat(path).st_mtime_ns
+        return None
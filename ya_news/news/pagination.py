@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор на пару (created, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        return datetime.fromisoformat(created), int(pk)
+    except (ValueError, UnicodeError):
+        raise BadRequest('Некорректный курсор.')
+
+
+def comments_after(queryset, per_page, cursor=None):
+    """Запрос на страницу комментариев и один лишний для курсора."""
+    queryset = queryset.order_by('created', 'pk')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    return queryset[:per_page + 1]
+
+
+def split_page(comments, per_page):
+    if len(comments) <= per_page:
+        return comments, None
+    comments = comments[:per_page]
+    return comments, encode_cursor(comments[-1])
+
+
+def paginate_comments(queryset, per_page, cursor=None):
+    """
+    Возвращает страницу комментариев и курсор следующей страницы.
+
+    Пагинация по ключу (created, id): стоимость запроса не зависит
+    от того, насколько далеко читатель пролистал обсуждение.
+    """
+    return split_page(
+        list(comments_after(queryset, per_page, cursor)), per_page
+    )
+
+
+async def apaginate_comments(queryset, per_page, cursor=None):
+    """Асинхронная версия paginate_comments."""
+    return split_page(
+        [comment async for comment in comments_after(
+            queryset, per_page, cursor
+        )],
+        per_page,
+    )
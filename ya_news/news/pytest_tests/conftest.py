@@ -1,15 +1,82 @@
+import importlib
 from datetime import timedelta
 
 import pytest
 from django.conf import settings
-from django.test import Client
-from django.urls import reverse
+from django.core.cache import cache
+from django.test import AsyncClient, Client
+from django.urls import clear_url_caches, reverse
 from django.utils import timezone
 
+from news import urls as news_urls
+from news.forms import bad_words
 from news.models import Comment, News
+from yanews import urls as project_urls
+from yanews.metrics import registry
+from yanews.routers import ReplicaRouter
 
 
 EXTRA_NEWS = 5
+COMMENTS_PER_NEWS = 3
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_bad_words():
+    yield
+    bad_words.load()
+    bad_words.reset()
+
+
+def reload_urls():
+    importlib.reload(news_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    """Подключает асинхронные версии представлений."""
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.fixture
+def replicas(settings):
+    """Включает чтение с тестовой реплики."""
+    settings.DATABASE_REPLICAS = ['replica']
+    ReplicaRouter.health.checked.clear()
+    yield settings
+    ReplicaRouter.health.checked.clear()
+
+
+@pytest.fixture
+def metrics():
+    registry.clear()
+    yield registry
+    registry.clear()
+
+
+@pytest.fixture
+def metrics_url():
+    return reverse('metrics')
+
+
+@pytest.fixture
+def scrape(client, metrics_url, settings):
+    """Запрос к /metrics с токеном, как его делает Prometheus."""
+    def scrape():
+        return client.get(metrics_url, headers={
+            'Authorization': f'Bearer {settings.METRICS_TOKEN}'
+        })
+    return scrape
 
 
 @pytest.fixture
@@ -17,6 +84,11 @@ def detail_url(news):
     return reverse('news:detail', args=[news.pk])
 
 
+@pytest.fixture
+def comments_url(news):
+    return reverse('news:comments', args=[news.pk])
+
+
 @pytest.fixture
 def edit_url(comment):
     return reverse('news:edit', args=[comment.pk])
@@ -50,6 +122,13 @@ def client_author(author):
     return client
 
 
+@pytest.fixture
+def async_client_author(author):
+    client = AsyncClient()
+    client.force_login(author)
+    return client
+
+
 @pytest.fixture
 def client_reader(reader):
     client = Client()
@@ -79,6 +158,11 @@ def home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -119,3 +203,14 @@ def many_news(db):
         )
         for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + EXTRA_NEWS)
     )
+
+
+@pytest.fixture
+def many_comments(many_news, author):
+    return [
+        Comment.objects.create(
+            news=news, author=author, text=f'Комментарий {index}'
+        )
+        for news in many_news
+        for index in range(COMMENTS_PER_NEWS)
+    ]
@@ -0,0 +1,77 @@
+import pytest
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from news.models import Comment
+
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_list_url():
+    return reverse('news:api-list')
+
+
+@pytest.fixture
+def api_comments_url(news):
+    return reverse('news:api-comments', args=[news.pk])
+
+
+def test_news_list_json(client, api_list_url, many_news, settings):
+    """Лента в JSON совпадает с главной страницей."""
+    response = client.get(api_list_url)
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert len(results) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert results[0]['id'] == many_news[0].pk
+    assert response['ETag'].startswith('"')
+
+
+def test_unchanged_list_costs_one_query(
+        client, api_list_url, many_news, django_assert_num_queries
+):
+    """Неизменившаяся лента отдаёт 304 за один запрос к БД."""
+    etag = client.get(api_list_url)['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(api_list_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_comments_etag_changes_with_comments(
+        client, api_comments_url, comment, author, news
+):
+    """Версия обсуждения меняется при новых и исправленных комментариях."""
+    etag = client.get(api_comments_url)['ETag']
+    response = client.get(api_comments_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='Ещё один')
+    response = client.get(api_comments_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    etag = response['ETag']
+    comment.text = 'Исправлено'
+    comment.save()
+    response = client.get(api_comments_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['text'] == 'Исправлено'
+
+
+def test_comments_cursor_pagination(
+        client, api_comments_url, comments, settings
+):
+    """Комментарии отдаются страницами по курсору."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    first = client.get(api_comments_url).json()
+    second = client.get(
+        api_comments_url, {'cursor': first['next_cursor']}
+    ).json()
+    ids = [item['id'] for item in first['results'] + second['results']]
+    assert ids == [comment.pk for comment in comments]
+    assert second['next_cursor'] is None
+
+
+def test_comments_of_missing_news(client):
+    """Для несуществующей новости API отвечает 404."""
+    response = client.get(reverse('news:api-comments', args=[0]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
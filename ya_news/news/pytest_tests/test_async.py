@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.urls import resolve
+
+from news.forms import CommentForm
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_views_selected_by_setting(home_url, detail_url):
+    """Настройка NEWS_ASYNC_VIEWS подключает асинхронные представления."""
+    assert iscoroutinefunction(resolve(home_url).func)
+    assert iscoroutinefunction(resolve(detail_url).func)
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_home_page(async_client, home_url, news):
+    """Главная на асинхронном ORM отдаёт те же новости и кэшируется."""
+    response = async_to_sync(async_client.get)(home_url)
+    assert list(response.context['object_list']) == [news]
+    cached = async_to_sync(async_client.get)(home_url)
+    assert cached.context is None
+    assert cached.content == response.content
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_detail_page(async_client_author, detail_url, comment):
+    """Страница новости на асинхронном ORM показывает комментарии."""
+    response = async_to_sync(async_client_author.get)(detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert list(response.context['comments']) == [comment]
+    assert response.context['next_cursor'] is None
+    assert isinstance(response.context['form'], CommentForm)
+    assert 'desc="3 queries"' in response['Server-Timing']
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_detail_view_accepts_comments(
+        async_client_author, detail_url, news
+):
+    """Комментарий отправляется и через асинхронную страницу новости."""
+    response = async_to_sync(async_client_author.post)(
+        detail_url, {'text': 'Новый комментарий'}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.get().text == 'Новый комментарий'
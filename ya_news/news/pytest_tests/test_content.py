@@ -1,8 +1,19 @@
 import pytest
 from http import HTTPStatus
+from io import StringIO
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.template import TemplateSyntaxError, engines
+from django.urls import reverse
+
+from news.cache import comment_fragment_key, get_group_version, news_group
 from news.forms import BAD_WORDS
-from news.models import Comment
+from news.models import Comment, News
+from news.pytest_tests.conftest import COMMENTS_PER_NEWS
+from yanews.settings.prod import TEMPLATES as PRODUCTION_TEMPLATES
+from yanews.templating import preload_templates, template_names
 
 
 pytestmark = pytest.mark.django_db
@@ -91,3 +102,152 @@ def test_reader_cannot_delete_comment(client_reader, comment, delete_url):
     assert comment.author == original_comment.author
     assert comment.news == original_comment.news
     assert comment.created == original_comment.created
+
+
+def test_home_comment_count_in_one_query(
+        client, home_url, many_comments, django_assert_num_queries
+):
+    """Количество комментариев на главной считается одним запросом."""
+    with django_assert_num_queries(1):
+        response = client.get(home_url)
+    object_list = response.context['object_list']
+    assert all(
+        news.comment_count == COMMENTS_PER_NEWS for news in object_list
+    )
+    assert f'Комментариев: {COMMENTS_PER_NEWS}' in response.content.decode()
+
+
+def test_detail_shows_first_comment_page(
+        client, detail_url, comments, settings
+):
+    """На странице новости только первая страница комментариев."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    response = client.get(detail_url)
+    assert response.context['comments'] == comments[:2]
+    assert response.context['next_cursor']
+
+
+def test_load_more_returns_next_comment_page(
+        client, detail_url, comments_url, comments, settings
+):
+    """«Показать ещё» отдаёт оставшиеся комментарии по курсору."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 2
+    cursor = client.get(detail_url).context['next_cursor']
+    response = client.get(comments_url, {'cursor': cursor})
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['comments'] == comments[2:]
+    assert response.context['next_cursor'] is None
+
+
+def test_load_more_rejects_broken_cursor(client, comments_url):
+    """Некорректный курсор даёт ошибку 400."""
+    response = client.get(comments_url, {'cursor': 'broken'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_anonymous_page_served_from_cache(
+        client, detail_url, comment, django_assert_num_queries
+):
+    """Повторный анонимный запрос отдаётся из кэша без запросов к БД."""
+    client.get(detail_url)
+    with django_assert_num_queries(0):
+        response = client.get(detail_url)
+    assert comment.text in response.content.decode()
+
+
+def test_new_comment_invalidates_cached_pages(
+        client, client_author, detail_url, home_url, news,
+        django_capture_on_commit_callbacks
+):
+    """Новый комментарий сбрасывает кэш страницы новости и главной."""
+    client.get(detail_url)
+    client.get(home_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        client_author.post(detail_url, FORM_DATA)
+    assert COMMENT_TEXT in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+def test_cached_pages_invalidated_after_commit(
+        client, detail_url, news, comment, django_capture_on_commit_callbacks
+):
+    """Пока транзакция не зафиксирована, версия страниц не меняется."""
+    group = news_group(news.pk)
+    version = get_group_version(group)
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            comment.delete()
+            assert get_group_version(group) == version
+    assert get_group_version(group) != version
+
+
+def test_authorized_pages_not_cached(client_author, detail_url, comment):
+    """Авторизованным пользователям страница не отдаётся из кэша."""
+    client_author.get(detail_url)
+    response = client_author.get(detail_url)
+    assert response.context['form']
+
+
+def test_comment_fragment_cached_and_refreshed_on_edit(
+        client_author, comment, detail_url, edit_url
+):
+    """Фрагмент комментария кэшируется и обновляется после правки."""
+    client_author.get(detail_url)
+    assert comment.text in cache.get(comment_fragment_key(comment))
+    client_author.post(edit_url, EDIT_FORM_DATA)
+    content = client_author.get(detail_url).content.decode()
+    assert NEW_COMMENT_TEXT in content
+    assert comment.text not in content
+
+
+def test_search_ranks_and_highlights(client):
+    """Поиск ранжирует новости и подсвечивает совпадения."""
+    in_text = News.objects.create(
+        title='Погода', text='Завтра <b>дожди</b> и ветер'
+    )
+    in_title = News.objects.create(title='Дожди', text='Прогноз')
+    News.objects.create(title='Спорт', text='Футбол')
+    response = client.get(reverse('news:search'), {'q': 'дожд'})
+    object_list = list(response.context['object_list'])
+    assert object_list == [in_title, in_text]
+    assert object_list[0].title_match == '<mark>Дожди</mark>'
+    assert '&lt;b&gt;<mark>дожди</mark>&lt;/b&gt;' in object_list[1].snippet
+
+
+def test_search_is_paginated(client, many_news, settings):
+    """Результаты поиска разбиты на страницы."""
+    settings.NEWS_SEARCH_RESULTS_PER_PAGE = 4
+    response = client.get(reverse('news:search'), {'q': 'новост'})
+    assert len(response.context['object_list']) == 4
+    assert response.context['paginator'].count == len(many_news)
+
+
+def test_rebuild_news_search(client, news):
+    """Команда rebuild_news_search восстанавливает индекс."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(news_news_fts) VALUES ('delete-all')"
+        )
+    url = reverse('news:search')
+    assert not client.get(url, {'q': news.title}).context['object_list']
+    call_command('rebuild_news_search', stdout=StringIO())
+    assert client.get(url, {'q': news.title}).context['object_list']
+
+
+def test_production_templates_preloaded(settings):
+    """В продакшене все шаблоны компилируются при старте."""
+    settings.TEMPLATES = PRODUCTION_TEMPLATES
+    names = set(template_names(settings.TEMPLATES[0]['DIRS']))
+    assert preload_templates() == len(names)
+    loader = engines['django'].engine.template_loaders[0]
+    assert set(loader.get_template_cache) == names
+
+
+def test_preload_fails_on_broken_template(settings, tmp_path):
+    """Ошибка в любом шаблоне не даёт запустить приложение."""
+    (tmp_path / 'broken.html').write_text('{% if %}')
+    settings.TEMPLATES = [{
+        **PRODUCTION_TEMPLATES[0], 'DIRS': [tmp_path]
+    }]
+    with pytest.raises(TemplateSyntaxError, match='broken.html'):
+        preload_templates()
@@ -0,0 +1,103 @@
+import json
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import reverse
+
+from news.events import (
+    LocalBroker, RETRY_MS, comments_channel, get_broker
+)
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def events_url(news):
+    return reverse('news:events', args=[news.pk])
+
+
+def read_event(chunk):
+    """Разбирает событие comment на id и данные."""
+    lines = chunk.decode().splitlines()
+    assert lines[1] == 'event: comment'
+    return int(lines[0].removeprefix('id: ')), json.loads(
+        lines[2].removeprefix('data: ')
+    )
+
+
+def test_local_broker_delivers_across_threads(settings):
+    """Сообщение из другого потока доходит до подписчика в asyncio."""
+    broker = LocalBroker()
+
+    async def scenario():
+        async with broker.subscribe('channel') as subscription:
+            thread = threading.Thread(
+                target=broker.publish, args=('channel', {'id': 1})
+            )
+            thread.start()
+            thread.join()
+            assert await subscription.get(1) == {'id': 1}
+            assert await subscription.get(0.01) is None
+        assert broker.subscribers('channel') == 0
+
+    async_to_sync(scenario)()
+
+
+def test_new_comment_streamed_to_readers(
+        async_client, client_author, events_url, detail_url, news,
+        django_capture_on_commit_callbacks
+):
+    """Комментарий из формы приходит открытому потоку новости."""
+
+    def post_comment():
+        with django_capture_on_commit_callbacks(execute=True):
+            client_author.post(detail_url, {'text': 'Живой комментарий'})
+
+    async def scenario():
+        response = await async_client.get(events_url)
+        assert response['Content-Type'] == 'text/event-stream'
+        stream = aiter(response.streaming_content)
+        assert await anext(stream) == f'retry: {RETRY_MS}\n\n'.encode()
+        await sync_to_async(post_comment)()
+        chunk = await anext(stream)
+        await stream.aclose()
+        return chunk
+
+    event_id, data = read_event(async_to_sync(scenario)())
+    comment = Comment.objects.get()
+    assert event_id == data['id'] == comment.pk
+    assert 'Живой комментарий' in data['html']
+    assert get_broker().subscribers(comments_channel(news.pk)) == 0
+
+
+def test_reconnect_replays_missed_comments(
+        async_client, events_url, news, author
+):
+    """После переподключения с Last-Event-ID приходят пропущенные."""
+    seen, missed = Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for text in ('Прочитан', 'Пропущен')
+    )
+
+    async def scenario():
+        response = await async_client.get(
+            events_url, headers={'Last-Event-ID': str(seen.pk)}
+        )
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        chunk = await anext(stream)
+        await stream.aclose()
+        return chunk
+
+    event_id, data = read_event(async_to_sync(scenario)())
+    assert event_id == missed.pk
+    assert 'Пропущен' in data['html']
+
+
+def test_events_need_asgi(client, events_url):
+    """Под WSGI поток не открывается, чтобы не занимать воркер."""
+    response = client.get(events_url)
+    assert response.status_code == HTTPStatus.NOT_IMPLEMENTED
@@ -0,0 +1,28 @@
+import pytest
+from django.conf import settings
+
+from news.models import Comment, News
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_home_page_uses_date_index():
+    """Лента новостей читается по индексу news_date_idx."""
+    plan = News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE].explain()
+    assert 'USING INDEX news_date_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_comment_page_uses_news_created_index(news):
+    """Страница комментариев читается по составному индексу."""
+    queryset = Comment.objects.filter(news=news).order_by('created', 'pk')
+    plan = queryset.explain()
+    assert 'USING INDEX comment_news_created_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_author_comments_use_index(author):
+    """Комментарии автора ищутся по индексу, без полного сканирования."""
+    plan = Comment.objects.filter(author=author).explain()
+    assert 'USING INDEX' in plan
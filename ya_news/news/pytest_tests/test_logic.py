@@ -1,8 +1,14 @@
+import os
+
 import pytest
 from http import HTTPStatus
+from io import StringIO
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.urls import reverse
-from news.forms import BAD_WORDS
-from news.models import Comment
+from news.forms import BAD_WORDS, CommentForm, bad_words
+from news.models import BadWord, Comment, News
+from news.moderation import WordMatcher, normalize, stem
 
 
 pytestmark = pytest.mark.django_db
@@ -97,3 +103,128 @@ def test_reader_cannot_delete_comment(client_reader, comment):
     assert comment.author == original_comment.author
     assert comment.news == original_comment.news
     assert comment.created == original_comment.created
+
+
+def test_comment_count_follows_create_and_delete(
+        client_author, news, detail_url
+):
+    """Счётчик комментариев меняется при создании и удалении."""
+    client_author.post(detail_url, FORM_DATA)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get(news=news)
+    client_author.post(reverse('news:delete', args=[comment.pk]))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_recount_comments_repairs_counters(
+        comment, news, client, detail_url, django_capture_on_commit_callbacks
+):
+    """
+    Команда recount_comments чинит разошедшиеся счётчики, сдвигает
+    updated и сбрасывает закэшированные страницы.
+    """
+    News.objects.filter(pk=news.pk).update(comment_count=42)
+    news.refresh_from_db()
+    client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('recount_comments', stdout=StringIO())
+    fixed = News.objects.get(pk=news.pk)
+    assert fixed.comment_count == 1
+    assert fixed.updated > news.updated
+    assert client.get(detail_url).context is not None
+
+
+@pytest.mark.parametrize('text, expected', (
+    ('ushers', 'she'),
+    ('a hishe', 'his'),
+    ('this', 'his'),
+    ('shoes', None),
+    ('', None),
+))
+def test_word_matcher_finds_overlapping_words(text, expected):
+    """Автомат находит слова, в том числе перекрывающиеся."""
+    matcher = WordMatcher(('he', 'she', 'his', 'hers'))
+    assert matcher.find(text) == expected
+
+
+def test_bad_words_from_database(client_author, news):
+    """Слова из модели BadWord подхватываются без перезапуска."""
+    BadWord.objects.create(word='бяка')
+    url = reverse('news:detail', args=[news.pk])
+    response = client_author.post(url, {'text': 'Ты БЯКА'})
+    assert response.context['form'].has_error('text')
+    assert not Comment.objects.exists()
+
+
+def test_bad_words_file_reloaded(tmp_path, settings):
+    """Словарь из файла перечитывается после его изменения."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# комментарий\nзлодей\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = words_file
+    settings.NEWS_BAD_WORDS_RELOAD_INTERVAL = 0
+    assert not CommentForm({'text': 'Вот злодей!'}).is_valid()
+    assert CommentForm({'text': 'Вот негодник!'}).is_valid()
+    mtime_ns = words_file.stat().st_mtime_ns
+    words_file.write_text('негодник\n', encoding='utf-8')
+    # На ФС с грубыми отметками времени две записи подряд могут
+    # получить одинаковый mtime.
+    os.utime(words_file, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+    assert not CommentForm({'text': 'Вот негодник!'}).is_valid()
+
+
+def test_bad_words_file_not_checked_within_interval(monkeypatch):
+    """До истечения интервала файл словаря не проверяется."""
+    bad_words.get_matchers()
+    with monkeypatch.context() as patch:
+        patch.setattr(bad_words, '_file_state', lambda: pytest.fail(
+            'mtime файла проверен раньше интервала'
+        ))
+        assert CommentForm({'text': COMMENT_TEXT}).is_valid()
+
+
+@pytest.mark.parametrize('text', (
+    'р.е.д.и.с.к.а',
+    'Р-Е-Д-И-С-К-А',
+    'р е д и с к а',
+    'pедискa',
+    'РЕДИСКОЙ',
+    'негодяя',
+    'нег0дяем',
+))
+def test_obfuscated_bad_words_rejected(text):
+    """Словоформы и замаскированные написания тоже отклоняются."""
+    assert not CommentForm({'text': f'Ты {text}!'}).is_valid()
+
+
+@pytest.mark.parametrize('text', (
+    'Купил редис и свёклу.',
+    'Годится для негодования?',
+    'Comment 1',
+    'А я с ним и в кино, и в театр.',
+))
+def test_clean_text_not_rejected(text):
+    """Обычный текст не считается ругательством."""
+    assert CommentForm({'text': text}).is_valid()
+
+
+def test_normalize_and_stem():
+    """Нормализация складывает гомоглифы, стемминг снимает окончания."""
+    assert normalize('P.e.д-и_С*к@') == 'редиска'
+    assert normalize('р е д и с к а') == 'редиска'
+    assert normalize('я с ним и в кино') == 'я с ним и в кино'
+    assert stem('редиска') == 'редиск'
+    assert stem('гад') == 'гад'
+
+
+def test_sqlite_pragmas_applied_to_new_connections(settings):
+    """PRAGMA из настроек выполняются на новом соединении."""
+    settings.SQLITE_PRAGMAS = {'busy_timeout': 1234}
+    new_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone() == (1234,)
+    finally:
+        new_connection.close()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+from yanews.metrics import ARCHIVE_LOCK_NAME, ARCHIVE_NAME, registry
+
+pytestmark = pytest.mark.django_db
+
+
+def test_request_metrics_by_url_name(client, home_url, news, metrics, scrape):
+    """Время ответа, запросы и рендеринг учитываются по имени URL."""
+    client.get(home_url)
+    content = scrape().content.decode()
+    assert (
+        'http_request_duration_seconds_count'
+        '{method="GET",view="news:home"} 1'
+    ) in content
+    assert (
+        'http_request_duration_seconds_bucket'
+        '{method="GET",view="news:home",le="+Inf"} 1'
+    ) in content
+    assert 'db_queries_total{view="news:home"} 1' in content
+    assert (
+        'template_render_duration_seconds_count{view="news:home"} 1'
+    ) in content
+
+
+def test_cache_hit_ratio(client, home_url, news, metrics, scrape):
+    """Закэшированная страница считается попаданием и не рендерится."""
+    client.get(home_url)
+    client.get(home_url)
+    content = scrape().content.decode()
+    assert 'cache_requests_total{cache="page",result="hit"} 1' in content
+    assert 'cache_requests_total{cache="page",result="miss"} 1' in content
+    assert (
+        'template_render_duration_seconds_count{view="news:home"} 1'
+    ) in content
+
+
+def test_finished_threads_merged(metrics):
+    """Значения потоков отдельных ASGI-запросов не теряются и не копятся."""
+    async def serve():
+        # Как ASGI-сервер: у каждого запроса свой ThreadSensitiveContext.
+        for _ in range(20):
+            async with ThreadSensitiveContext():
+                await sync_to_async(registry.inc)(
+                    'db_queries_total', view='x'
+                )
+
+    asyncio.run(serve())
+    assert len(registry.shards) <= 2
+    assert registry.collect()['db_queries_total', (('view', 'x'),)] == 20
+
+
+@pytest.mark.parametrize('authorization', (
+    None, 'Bearer wrong', 'Bearer неверный',
+))
+def test_metrics_require_token(client, metrics_url, authorization):
+    """Без верного токена страницы метрик нет, даже с 127.0.0.1."""
+    headers = {'Authorization': authorization} if authorization else {}
+    response = client.get(metrics_url, headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_metrics_disabled_without_token(settings, scrape):
+    settings.METRICS_TOKEN = None
+    assert scrape().status_code == HTTPStatus.NOT_FOUND
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def write_samples(path, value):
+    path.write_text(json.dumps([
+        ['db_queries_total', [['view', 'news:home']], value],
+    ]))
+
+
+def test_metrics_aggregated_across_processes(
+        client, home_url, news, metrics, settings, tmp_path, scrape
+):
+    """Значения живых воркеров складываются с архивом завершившихся."""
+    settings.METRICS_DIR = tmp_path
+    # Родитель тестового процесса жив, но может иметь старый файл
+    # от прежнего владельца того же pid.
+    parent = os.getppid()
+    write_samples(tmp_path / f'{parent}-old.json', 100)
+    os.utime(tmp_path / f'{parent}-old.json', (0, 0))
+    write_samples(tmp_path / f'{parent}-new.json', 4)
+    write_samples(tmp_path / f'{dead_pid()}-dead.json', 1000)
+    client.get(home_url)
+    for _ in range(2):
+        # Архив не складывается повторно при следующем запросе.
+        content = scrape().content.decode()
+        assert 'db_queries_total{view="news:home"} 1105' in content
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([
+        f'{parent}-new.json', registry.own_file_name(),
+        ARCHIVE_NAME, ARCHIVE_LOCK_NAME,
+    ])
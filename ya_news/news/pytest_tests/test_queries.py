@@ -0,0 +1,97 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from pytest_lazyfixture import lazy_fixture
+
+from news.forms import bad_words
+from news.views import NewsList
+from yanews.auth import CachedModelBackend, forget_user
+from yanews.middleware import QueryBudgetExceeded
+
+
+pytestmark = pytest.mark.django_db
+
+COMMENT_FORM_DATA = {'text': 'Новый текст'}
+
+# Сессия берётся из кэша, пользователь на первом запросе читается из БД
+# (кэш пользователей процесса сбрасывается при его создании).
+# SAVEPOINT и RELEASE транзакций тоже считаются запросами.
+QUERY_BUDGETS = (
+    ('get', lazy_fixture('client'), lazy_fixture('home_url'), None, 1),
+    ('get', lazy_fixture('client'), lazy_fixture('detail_url'), None, 2),
+    ('get', lazy_fixture('client_author'), lazy_fixture('detail_url'),
+     None, 3),
+    ('post', lazy_fixture('client_author'), lazy_fixture('detail_url'),
+     COMMENT_FORM_DATA, 6),
+    ('get', lazy_fixture('client_author'), lazy_fixture('edit_url'),
+     None, 2),
+    ('post', lazy_fixture('client_author'), lazy_fixture('edit_url'),
+     COMMENT_FORM_DATA, 4),
+    ('get', lazy_fixture('client_author'), lazy_fixture('delete_url'),
+     None, 2),
+    ('post', lazy_fixture('client_author'), lazy_fixture('delete_url'),
+     None, 6),
+)
+
+
+@pytest.mark.parametrize(
+    'method, user_client, url, data, budget', QUERY_BUDGETS
+)
+def test_query_budget(
+        method, user_client, url, data, budget, comment,
+        django_assert_num_queries
+):
+    """Число запросов к БД на каждую страницу закреплено."""
+    bad_words.get_matchers()
+    with django_assert_num_queries(budget):
+        getattr(user_client, method)(url, data or {})
+
+
+def test_server_timing_header(client, detail_url):
+    """Число запросов и время в БД отдаются в заголовке Server-Timing."""
+    response = client.get(detail_url)
+    assert response['Server-Timing'].startswith('db;dur=')
+    assert 'desc="2 queries"' in response['Server-Timing']
+
+
+def test_query_budget_exceeded_raises(client, home_url, monkeypatch):
+    """В тестах превышение бюджета представления роняет запрос."""
+    monkeypatch.setattr(NewsList, 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(home_url)
+
+
+def test_query_budget_exceeded_warns(
+        client, home_url, monkeypatch, settings, caplog
+):
+    """В продакшене превышение бюджета только пишется в лог."""
+    settings.QUERY_BUDGET_STRICT = False
+    monkeypatch.setattr(NewsList, 'query_budget', 0)
+    with caplog.at_level(logging.WARNING, logger='yanews.middleware'):
+        response = client.get(home_url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'NewsList' in caplog.text
+
+
+def test_session_and_user_cached(
+        client_author, detail_url, news, django_assert_num_queries
+):
+    """Повторный запрос не читает из БД ни сессию, ни пользователя."""
+    client_author.get(detail_url)
+    with django_assert_num_queries(2):
+        client_author.get(detail_url)
+
+
+def test_async_user_lookup_uses_cache(author, django_assert_num_queries):
+    """aget_user читает пользователя из того же кэша, что и get_user."""
+    backend = CachedModelBackend()
+    backend.get_user(author.pk)
+    with django_assert_num_queries(0):
+        assert async_to_sync(backend.aget_user)(author.pk) == author
+    forget_user(author.pk)
+    with django_assert_num_queries(1):
+        async_to_sync(backend.aget_user)(author.pk)
+    with django_assert_num_queries(0):
+        backend.get_user(author.pk)
@@ -0,0 +1,106 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+
+from news.models import News
+from yanews.middleware import PIN_COOKIE
+from yanews.routers import ReplicaRouter, RequestState, request_state
+
+
+pytestmark = pytest.mark.django_db(
+    transaction=True, databases=[DEFAULT_DB_ALIAS, 'replica']
+)
+
+
+def test_home_reads_from_replica(client, home_url, replicas):
+    """Главная страница читает новости с реплики."""
+    News.objects.create(title='Из основной базы', text='Текст')
+    News.objects.using('replica').create(title='С реплики', text='Текст')
+    response = client.get(home_url)
+    titles = [news.title for news in response.context['object_list']]
+    assert titles == ['С реплики']
+
+
+def test_home_reads_from_default_without_replicas(client, home_url, news):
+    """Без DATABASE_REPLICAS всё читается из default."""
+    News.objects.using('replica').create(title='С реплики', text='Текст')
+    response = client.get(home_url)
+    assert list(response.context['object_list']) == [news]
+
+
+def test_reads_pinned_to_default_after_write(
+        client, client_author, detail_url, replicas
+):
+    """После комментария автор читает из default, остальные — с реплики."""
+    call_command('sync_replicas')
+    response = client_author.post(detail_url, {'text': 'Свежий комментарий'})
+    assert response.cookies[PIN_COOKIE]['max-age'] == (
+        replicas.REPLICA_PIN_SECONDS
+    )
+    response = client_author.get(detail_url)
+    texts = [comment.text for comment in response.context['comments']]
+    assert texts == ['Свежий комментарий']
+    response = client.get(detail_url)
+    assert list(response.context['comments']) == []
+
+
+def test_sync_replaces_pages_cached_from_stale_replica(
+        client, client_author, detail_url, replicas
+):
+    """Страница, закэшированная с отстающей реплики, сбрасывается."""
+    call_command('sync_replicas')
+    client_author.post(detail_url, {'text': 'Свежий комментарий'})
+    response = client.get(detail_url)
+    assert 'Свежий комментарий' not in response.content.decode()
+    call_command('sync_replicas')
+    response = client.get(detail_url)
+    assert 'Свежий комментарий' in response.content.decode()
+
+
+def test_read_does_not_pin(client, home_url, replicas):
+    response = client.get(home_url)
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_unhealthy_replica_skipped(client, home_url, replicas):
+    """Реплика, не прошедшая проверку, пропускается."""
+    replicas.DATABASE_REPLICAS = ['missing', 'replica']
+    News.objects.using('replica').create(title='С реплики', text='Текст')
+    News.objects.create(title='Из основной базы', text='Текст')
+    for _ in range(3):
+        cache.clear()
+        response = client.get(home_url)
+        titles = [news.title for news in response.context['object_list']]
+        assert titles == ['С реплики']
+
+
+def test_replicas_round_robin(replicas):
+    replicas.DATABASE_REPLICAS = ['replica', DEFAULT_DB_ALIAS]
+    router = ReplicaRouter()
+    chosen = {router.choose_replica() for _ in range(2)}
+    assert chosen == {'replica', DEFAULT_DB_ALIAS}
+
+
+def test_one_replica_per_request(replicas):
+    replicas.DATABASE_REPLICAS = ['replica', DEFAULT_DB_ALIAS]
+    router = ReplicaRouter()
+    state = RequestState()
+    state.use_replica = True
+    token = request_state.set(state)
+    try:
+        chosen = {router.db_for_read(News) for _ in range(3)}
+    finally:
+        request_state.reset(token)
+    assert len(chosen) == 1
+
+
+def test_async_home_reads_from_replica(
+        client, home_url, replicas, async_views
+):
+    """Асинхронный ORM тоже читает с реплики."""
+    News.objects.create(title='Из основной базы', text='Текст')
+    News.objects.using('replica').create(title='С реплики', text='Текст')
+    response = client.get(home_url)
+    titles = [news.title for news in response.context['object_list']]
+    assert titles == ['С реплики']
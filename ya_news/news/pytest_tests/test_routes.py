@@ -8,6 +8,8 @@ pytestmark = pytest.mark.django_db
 public_urls = (
     lazy_fixture('home_url'),
     lazy_fixture('detail_url'),
+    lazy_fixture('comments_url'),
+    lazy_fixture('search_url'),
     lazy_fixture('login_url'),
     lazy_fixture('signup_url')
 )
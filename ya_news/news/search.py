@@ -0,0 +1,70 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+WORD = re.compile(r'\w+')
+# Символы из области частного использования Unicode: в тексте новостей
+# их нет, поэтому ими можно отметить совпадения до экранирования HTML.
+MARK_START, MARK_END = '\ue000', '\ue001'
+RANK = 'bm25(news_news_fts, 10.0, 1.0)'
+TITLE_HIGHLIGHT = f"highlight(news_news_fts, 0, '{MARK_START}', '{MARK_END}')"
+TEXT_SNIPPET = (
+    f"snippet(news_news_fts, 1, '{MARK_START}', '{MARK_END}', '…', 24)"
+)
+SNIPPET_WORDS = 24
+
+
+def fts_query(query):
+    """
+    Переводит пользовательский запрос в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется как префикс, слова
+    объединяются через AND. Операторы FTS5 из ввода не проходят.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def search_news(queryset, query):
+    """
+    Фильтрует новости по запросу и сортирует по релевантности.
+
+    Найденным новостям добавляются атрибуты title_match и snippet
+    с отмеченными совпадениями, см. highlight(). На SQLite используется
+    индекс FTS5 из миграции 0006_news_search, на остальных СУБД —
+    поиск подстроки.
+    """
+    match = fts_query(query)
+    if not match:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(title__icontains=query) | Q(text__icontains=query)
+        ).extra(select={'title_match': 'title', 'snippet': 'text'})
+    return queryset.extra(
+        tables=['news_news_fts'],
+        where=[
+            'news_news_fts.rowid = news_news.id',
+            'news_news_fts MATCH %s',
+        ],
+        params=[match],
+        select={
+            'rank': RANK,
+            'title_match': TITLE_HIGHLIGHT,
+            'snippet': TEXT_SNIPPET,
+        },
+        order_by=['rank'],
+    )
+
+
+def highlight(value):
+    """Экранирует текст и превращает отметки совпадений в <mark>."""
+    value = Truncator(value).words(SNIPPET_WORDS, truncate='…')
+    return mark_safe(
+        escape(value)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
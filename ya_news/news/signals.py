@@ -0,0 +1,73 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_news_pages
+from .forms import bad_words
+from .models import BadWord, Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """
+    Новый комментарий увеличивает счётчик у новости.
+
+    Любое сохранение комментария сдвигает News.updated, по которому
+    API считает ETag.
+    """
+    if raw:
+        return
+    changes = {'updated': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчик у новости."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        updated=timezone.now(),
+    )
+
+
+def invalidate_on_commit(using, news_id, home=True):
+    """
+    Страницы сбрасываются после фиксации транзакции.
+
+    Иначе параллельный запрос успел бы прочитать ещё старые данные
+    и сохранить страницу под новой версией группы.
+    """
+    transaction.on_commit(
+        partial(invalidate_news_pages, news_id, home=home), using=using
+    )
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news(sender, instance, using, **kwargs):
+    """Изменение новости меняет её страницу и главную."""
+    invalidate_on_commit(using, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_saved_comment(sender, instance, created, using, **kwargs):
+    """Новый комментарий меняет ещё и счётчик на главной."""
+    invalidate_on_commit(using, instance.news_id, home=created)
+
+
+@receiver(post_delete, sender=Comment)
+def invalidate_deleted_comment(sender, instance, using, **kwargs):
+    invalidate_on_commit(using, instance.news_id)
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def reload_bad_words(sender, **kwargs):
+    bad_words.reset()
@@ -1,16 +1,39 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list, news_detail = views.AsyncNewsList, views.AsyncNewsDetailView
+else:
+    news_list, news_detail = views.NewsList, views.NewsDetailView
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/events/',
+        views.NewsEvents.as_view(),
+        name='events'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.news_list, name='api-list'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.news_comments,
+        name='api-comments'
+    ),
 ]
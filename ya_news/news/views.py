@@ -1,16 +1,97 @@
+from functools import partial
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
 from django.urls import reverse
 from django.views import generic
 
+from . import cache, events
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import apaginate_comments, paginate_comments
+from .search import highlight, search_news
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэширует страницу целиком для анонимных читателей.
+
+    Для всех анонимов страница одинакова, поэтому ключом служит URL.
+    Ответы, которые выставляют cookie или используют CSRF-токен,
+    не кэшируются. Сбросом занимаются сигналы в news.signals.
+    """
+
+    def get_cache_group(self):
+        return cache.HOME_GROUP
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = cache.page_cache_key(
+            self.get_cache_group(), request.get_full_path()
+        )
+        response = cache.get_page(key)
+        if response is not None:
+            return response
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda rendered: self.store_response(key, rendered)
+        )
+        return response
 
+    def store_response(self, key, response):
+        if (
+            response.status_code == HTTPStatus.OK
+            and not response.cookies
+            and not self.request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        ):
+            cache.store_page(key, response)
+
+
+class NewsPageCacheMixin(AnonymousPageCacheMixin):
+    """Страницы одной новости сбрасываются вместе с ней."""
+
+    def get_cache_group(self):
+        return cache.news_group(self.kwargs['pk'])
+
+
+class AsyncPageCacheMixin:
+    """
+    Тот же кэш страниц для асинхронных представлений.
+
+    Страницу готовит корутина render_page. Пользователь загружается
+    асинхронно и подставляется в request.user, чтобы шаблоны
+    не читали его из БД ещё раз.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if request.user.is_authenticated:
+            return await self.render_page()
+        key = await cache.apage_cache_key(
+            self.get_cache_group(), request.get_full_path()
+        )
+        response = await cache.aget_page(key)
+        if response is not None:
+            return response
+        response = await self.render_page()
+        response.add_post_render_callback(
+            lambda rendered: self.store_response(key, rendered)
+        )
+        return response
 
-class NewsList(generic.ListView):
+
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
+    query_budget = 3
+    use_replica = True
     template_name = 'news/home.html'
 
     def get_queryset(self):
@@ -18,22 +99,69 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Количество комментариев берётся из счётчика News.comment_count,
+        сами комментарии не загружаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
+class AsyncNewsList(AsyncPageCacheMixin, NewsList):
+    """Список новостей на асинхронном ORM."""
+
+    async def render_page(self):
+        self.object_list = [news async for news in self.get_queryset()]
+        return self.render_to_response(self.get_context_data())
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+    query_budget = 4
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_SEARCH_RESULTS_PER_PAGE
+
+    def get_queryset(self):
+        return search_news(News.objects.all(), self.request.GET.get('q', ''))
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for news in context['object_list']:
+            news.title_match = highlight(news.title_match)
+            news.snippet = highlight(news.snippet)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class CommentPageMixin:
+    """
+    Добавляет в контекст одну страницу комментариев к новости.
+
+    Асинхронные представления загружают страницу сами и передают
+    comments и next_cursor в get_context_data.
+    """
+
+    def get_comment_page_args(self):
+        return (
+            self.object.comment_set.select_related('author'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+            self.request.GET.get('cursor'),
         )
-        return obj
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if 'comments' not in context:
+            comments, context['next_cursor'] = paginate_comments(
+                *self.get_comment_page_args()
+            )
+            context['comments'] = cache.attach_comment_fragments(comments)
+        return context
+
+
+class NewsDetail(NewsPageCacheMixin, CommentPageMixin,
+                 generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +170,35 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class AsyncNewsDetail(AsyncPageCacheMixin, NewsDetail):
+    """Страница новости на асинхронном ORM."""
+
+    async def render_page(self):
+        self.object = await aget_object_or_404(
+            self.get_queryset(), pk=self.kwargs['pk']
+        )
+        comments, next_cursor = await apaginate_comments(
+            *self.get_comment_page_args()
+        )
+        comments = await sync_to_async(cache.attach_comment_fragments)(
+            comments
+        )
+        return self.render_to_response(self.get_context_data(
+            object=self.object, comments=comments, next_cursor=next_cursor
+        ))
+
+
+class NewsComments(NewsPageCacheMixin, CommentPageMixin,
+                   generic.DetailView):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    model = News
+    query_budget = 4
+    template_name = 'news/comments.html'
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,19 +210,32 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    @transaction.atomic
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        transaction.on_commit(partial(events.publish_comment, comment))
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    """
+    Страница новости и отправка комментария к ней.
+
+    Бюджет запросов рассчитан на POST: кроме сессии, пользователя,
+    новости и вставки комментария сюда входит обновление счётчика
+    и периодическая перезагрузка словаря запрещённых слов.
+    GET-запросы (NewsDetail) читают с реплики, POST — из default.
+    """
+    query_budget = 8
+    use_replica = True
 
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
@@ -78,27 +246,85 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class AsyncNewsDetailView(NewsDetailView):
+    """
+    Асинхронная страница новости.
+
+    Отправка комментария остаётся синхронной и выполняется в потоке.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        view = AsyncNewsDetail.as_view()
+        return await view(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
+
+
+class NewsEvents(generic.View):
+    """
+    Новые комментарии к новости в формате server-sent events.
+
+    Каждое соединение обслуживает корутина, ждущая сообщений брокера,
+    поэтому тысячи открытых страниц не занимают потоков. Под WSGI
+    бесконечный поток занял бы воркер целиком, и он не отдаётся.
+    """
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(
+                'Поток событий доступен только под ASGI.',
+                status=HTTPStatus.NOT_IMPLEMENTED,
+            )
+        news = await aget_object_or_404(News, pk=pk)
+        last_id = request.headers.get('Last-Event-ID', '')
+        response = StreamingHttpResponse(
+            events.comment_events(
+                news.pk, int(last_id) if last_id.isdigit() else None
+            ),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен, новость для адреса не нужна."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости нужен только шаблонам GET-страниц.
+        """
+        queryset = self.model.objects.filter(author=self.request.user)
+        if self.request.method == 'GET':
+            queryset = queryset.select_related('news')
+        return queryset
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
     """Редактирование комментария."""
     template_name = 'news/edit.html'
+    # Как и в NewsDetailView, учтена перезагрузка словаря запрещённых слов.
+    query_budget = 6
     form_class = CommentForm
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+    query_budget = 7
+
+    @transaction.atomic
+    def form_valid(self, form):
+        return super().form_valid(form)
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from yanews.templating import preload_templates
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
 application = get_asgi_application()
+
+if settings.PRELOAD_TEMPLATES:
+    preload_templates()
@@ -0,0 +1,99 @@
+"""
+Чтение с реплик для страниц, которые только читают данные.
+
+Представление включает это атрибутом use_replica = True, а
+ReplicaMiddleware отмечает такие GET-запросы в request_state.
+ReplicaRouter отправляет все чтения отмеченного запроса на одну
+реплику из DATABASE_REPLICAS: реплики выбираются по кругу, не
+прошедшие проверку пропускаются. Запись всегда идёт в default.
+"""
+import itertools
+from contextvars import ContextVar
+from time import monotonic
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+
+# Состояние текущего запроса. Переменная контекста, а не поток:
+# асинхронный ORM выполняет запросы в других потоках.
+request_state = ContextVar('replica_request_state', default=None)
+
+
+class RequestState:
+    """Читает ли запрос с реплики и писал ли он в базу."""
+
+    def __init__(self):
+        self.use_replica = False
+        self.replica = None
+        self.wrote = False
+
+
+class ReplicaHealth:
+    """
+    Проверка реплик с результатом, который хранится
+    REPLICA_HEALTH_CHECK_INTERVAL секунд.
+
+    Реплика считается рабочей, если в ней есть таблица миграций:
+    пустой файл SQLite открывается без ошибок, но читать из него нечего.
+    """
+
+    def __init__(self):
+        self.checked = {}
+
+    def is_healthy(self, alias):
+        now = monotonic()
+        checked = self.checked.get(alias)
+        if (
+            checked is None
+            or now - checked[0] >= settings.REPLICA_HEALTH_CHECK_INTERVAL
+        ):
+            checked = self.checked[alias] = (now, self.check(alias))
+        return checked[1]
+
+    @staticmethod
+    def check(alias):
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+        except (ConnectionDoesNotExist, DatabaseError):
+            return False
+        return True
+
+
+class ReplicaRouter:
+    """Чтения отмеченных запросов — на реплики, остальное — в default."""
+
+    counter = itertools.count()
+    health = ReplicaHealth()
+
+    def choose_replica(self):
+        healthy = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self.health.is_healthy(alias)
+        ]
+        if not healthy:
+            return DEFAULT_DB_ALIAS
+        return healthy[next(self.counter) % len(healthy)]
+
+    def db_for_read(self, model, **hints):
+        """Все чтения одного запроса идут на одну и ту же реплику."""
+        state = request_state.get()
+        if state is None or not state.use_replica:
+            return None
+        if state.replica is None:
+            state.replica = self.choose_replica()
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики — копии default, связи между ними допустимы."""
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,155 @@
+import os
+from pathlib import Path
+
+from django.urls import reverse_lazy
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'news.apps.NewsConfig',
+]
+
+MIDDLEWARE = [
+    'yanews.middleware.MetricsMiddleware',
+    'yanews.middleware.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanews.middleware.QueryBudgetMiddleware',
+]
+
+ROOT_URLCONF = 'yanews.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yanews.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'DJANGO_DATABASE_PATH', BASE_DIR / 'db.sqlite3'
+        ),
+    }
+}
+
+# Реплики для чтения: пути к файлам SQLite через запятую. Локально
+# реплику можно получить командой sync_replicas.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get(
+    'DJANGO_REPLICA_DATABASE_PATHS', ''
+).split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['yanews.routers.ReplicaRouter']
+# Сколько секунд после записи браузер читает только из default.
+REPLICA_PIN_SECONDS = 10
+REPLICA_HEALTH_CHECK_INTERVAL = 30
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+
+AUTH_PASSWORD_VALIDATORS = []
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGIN_URL = reverse_lazy('users:login')
+LOGIN_REDIRECT_URL = reverse_lazy('news:home')
+
+NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+NEWS_SEARCH_RESULTS_PER_PAGE = 10
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+NEWS_COMMENT_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+NEWS_BAD_WORDS_FILE = BASE_DIR / 'bad_words.txt'
+NEWS_BAD_WORDS_RELOAD_INTERVAL = 60
+
+QUERY_BUDGET_STRICT = False
+QUERY_BUDGET_SERVER_TIMING = True
+
+# Токен для /metrics (Authorization: Bearer <токен>); без него
+# страница метрик отключена.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Каталог для сложения метрик нескольких воркеров; None — только свой
+# процесс.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+
+# Асинхронные версии главной страницы и страницы новости (для ASGI).
+NEWS_ASYNC_VIEWS = os.environ.get('NEWS_ASYNC_VIEWS') == '1'
+
+# Брокер, через который новые комментарии рассылаются читателям
+# (server-sent events). LocalBroker работает в пределах процесса.
+NEWS_EVENTS_BROKER = 'news.events.LocalBroker'
+NEWS_EVENTS_QUEUE_SIZE = 100
+NEWS_EVENTS_KEEPALIVE = 15
+
+# Сессии и пользователи читаются из кэша default. При нескольких
+# процессах кэш должен быть общим, иначе изменения пользователя
+# другие процессы увидят только через USER_CACHE_TIMEOUT.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['yanews.auth.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60
+
+# Загружать все шаблоны при старте процесса (см. prod).
+PRELOAD_TEMPLATES = False
+
+# PRAGMA, которые выполняются на каждом новом соединении с SQLite.
+SQLITE_PRAGMAS = {}
@@ -0,0 +1,10 @@
+from .prod import *  # noqa: F401,F403
+from .prod import DATABASES
+
+# Под ASGI сигналы начала и конца запроса, закрывающие устаревшие
+# соединения, выполняются не в том потоке, где работал ORM, и
+# постоянные соединения копятся. Поэтому соединение на каждый запрос.
+DATABASES = {
+    **DATABASES,
+    'default': {**DATABASES['default'], 'CONN_MAX_AGE': 0},
+}
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from yanews.templating import preload_templates
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
 application = get_wsgi_application()
+
+if settings.PRELOAD_TEMPLATES:
+    preload_templates()
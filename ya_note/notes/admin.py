@@ -2,4 +2,13 @@ from django.contrib import admin
 
 from .models import Note
 
-admin.site.register(Note)
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    """Удаления из админки тоже оставляют следы для синхронизации."""
+
+    def delete_model(self, request, obj):
+        Note.delete_with_tombstones(Note.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        Note.delete_with_tombstones(queryset)
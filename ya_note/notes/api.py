@@ -0,0 +1,242 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.views import generic
+
+from .forms import WARNING, NoteForm
+from .models import ChangeCounter, DeletedNote
+from .slugs import MAX_SLUG_BATCH, allocate_slugs
+from .views import NoteBase
+
+NOTE_FIELDS = ('title', 'text', 'slug')
+# Наибольшее значение первичного ключа в SQLite.
+MAX_ID = 2 ** 63 - 1
+
+
+def serialize_note(note):
+    return {
+        'id': note.pk,
+        **{field: getattr(note, field) for field in NOTE_FIELDS},
+        'version': note.version,
+    }
+
+
+def error(index, errors):
+    return {'index': index, 'errors': errors}
+
+
+def check_ids(ids, errors):
+    """
+    Отбирает корректные id: целые в пределах первичного ключа и без
+    повторов. Для остальных в errors добавляются ошибки по элементам.
+
+    Возвращает пары (индекс, id).
+    """
+    valid = []
+    seen = set()
+    for index, pk in enumerate(ids):
+        if (
+            isinstance(pk, bool)
+            or not isinstance(pk, int)
+            or not 0 < pk <= MAX_ID
+        ):
+            errors.append(error(index, {'id': 'Некорректный id.'}))
+        elif pk in seen:
+            errors.append(error(index, {'id': 'id повторяется в пакете.'}))
+        else:
+            seen.add(pk)
+            valid.append((index, pk))
+    return valid
+
+
+class NoteAPI(NoteBase, generic.View):
+    """
+    Заметки пользователя в JSON.
+
+    GET отдаёт NOTES_PER_PAGE заметок после id из параметра after.
+    POST выполняет пакет операций, тело запроса —
+    {"create": [...], "update": [...], "delete": [...]}.
+    Все изменения выполняются в одной транзакции: bulk_create, bulk_update
+    и один DELETE, slug всей пачки проверяются одним запросом. Ошибки
+    возвращаются по каждому элементу, остальные элементы применяются.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        notes = self.get_queryset()
+        after = request.GET.get('after')
+        try:
+            if after is not None:
+                notes = notes.filter(pk__gt=int(after))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Некорректный параметр after.'}, status=400
+            )
+        per_page = settings.NOTES_PER_PAGE
+        notes = list(notes[:per_page + 1])
+        return JsonResponse({
+            'results': [serialize_note(note) for note in notes[:per_page]],
+            'next_after': notes[per_page - 1].pk
+            if len(notes) > per_page else None,
+        })
+
+    def post(self, request, *args, **kwargs):
+        try:
+            batch = json.loads(request.body)
+            creates = list(batch.get('create', ()))
+            updates = list(batch.get('update', ()))
+            deletes = list(batch.get('delete', ()))
+            if not all(isinstance(item, dict) for item in creates + updates):
+                raise TypeError
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'error': 'Некорректный JSON.'}, status=400)
+        if len(creates) + len(updates) > MAX_SLUG_BATCH:
+            return JsonResponse(
+                {'error': f'Не больше {MAX_SLUG_BATCH} заметок за раз.'},
+                status=400,
+            )
+        result = {'created': [], 'updated': [], 'deleted': [], 'errors': {
+            'create': [], 'update': [], 'delete': [],
+        }}
+        updates = [
+            (index, updates[index]) for index, _ in check_ids(
+                [item.get('id') for item in updates],
+                result['errors']['update'],
+            )
+        ]
+        deletes = check_ids(deletes, result['errors']['delete'])
+        with transaction.atomic():
+            new_notes = self.validate_creates(creates, result)
+            changed_notes = self.validate_updates(updates, result)
+            self.save_notes(new_notes, changed_notes, result)
+            self.delete_notes(deletes, result)
+        return JsonResponse(result)
+
+    def validate_creates(self, items, result):
+        notes = []
+        for index, item in enumerate(items):
+            form = NoteForm(data=item)
+            if not form.is_valid():
+                result['errors']['create'].append(
+                    error(index, form.errors.get_json_data())
+                )
+                continue
+            note = form.save(commit=False)
+            note.author = self.request.user
+            notes.append((index, form, note))
+        return notes
+
+    def validate_updates(self, items, result):
+        """Элементы приходят парами (индекс, элемент) с проверенными id."""
+        existing = self.get_queryset().in_bulk(
+            [item['id'] for _, item in items]
+        ) if items else {}
+        notes = []
+        for index, item in items:
+            note = existing.get(item['id'])
+            if note is None:
+                result['errors']['update'].append(
+                    error(index, {'id': 'Заметка не найдена.'})
+                )
+                continue
+            data = {field: getattr(note, field) for field in NOTE_FIELDS}
+            data.update(item)
+            form = NoteForm(data=data, instance=note)
+            if not form.is_valid():
+                result['errors']['update'].append(
+                    error(index, form.errors.get_json_data())
+                )
+                continue
+            notes.append((index, form, form.save(commit=False)))
+        return notes
+
+    def save_notes(self, new_notes, changed_notes, result):
+        """
+        Назначает slug одним запросом и пишет заметки пачками.
+
+        Конфликты slug, в том числе между элементами пакета, решаются
+        до записи и возвращаются ошибками по элементам.
+        """
+        pending = new_notes + changed_notes
+        for _, form, note in pending:
+            if form.slug_generated:
+                note.slug = ''
+        conflicts = {id(note) for note in allocate_slugs(
+            [note for _, _, note in pending]
+        )}
+        for key, notes in (('create', new_notes), ('update', changed_notes)):
+            for index, _, note in notes:
+                if id(note) in conflicts:
+                    result['errors'][key].append(
+                        error(index, {'slug': note.slug + WARNING})
+                    )
+        created = [
+            note for _, _, note in new_notes if id(note) not in conflicts
+        ]
+        updated = [
+            note for _, _, note in changed_notes if id(note) not in conflicts
+        ]
+        if created or updated:
+            versions = ChangeCounter.allocate(len(created) + len(updated))
+            for note, version in zip(created + updated, versions):
+                note.version = version
+        self.model.objects.bulk_create(created)
+        self.model.objects.bulk_update(updated, NOTE_FIELDS + ('version',))
+        result['created'] = [serialize_note(note) for note in created]
+        result['updated'] = [serialize_note(note) for note in updated]
+
+    def delete_notes(self, items, result):
+        """Элементы приходят парами (индекс, id) с проверенными id."""
+        if not items:
+            return
+        found = {
+            pk for pk, _ in self.model.delete_with_tombstones(
+                self.get_queryset().filter(pk__in=[pk for _, pk in items])
+            )
+        }
+        result['deleted'] = sorted(found)
+        result['errors']['delete'] += [
+            error(index, {'id': 'Заметка не найдена.'})
+            for index, pk in items if pk not in found
+        ]
+
+
+class NoteChangesAPI(NoteBase, generic.View):
+    """
+    Дельта-синхронизация: всё, что изменилось после версии since.
+
+    Изменённые заметки и следы удалённых отдаются вместе в порядке версий,
+    не больше NOTES_PER_PAGE за раз. Клиент сохраняет полученную version
+    и передаёт её в since следующего запроса, пока has_more истинно.
+    Стоимость запроса зависит от числа изменений, а не от числа заметок.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            since = int(request.GET.get('since', 0))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'Некорректный параметр since.'}, status=400
+            )
+        limit = settings.NOTES_PER_PAGE
+        notes = self.get_queryset().filter(
+            version__gt=since
+        ).order_by('version')[:limit + 1]
+        deleted = DeletedNote.objects.filter(
+            author=request.user, version__gt=since
+        ).order_by('version').values_list('version', 'note_id')[:limit + 1]
+        changes = sorted(
+            [(note.version, serialize_note(note), None) for note in notes]
+            + [(version, None, note_id) for version, note_id in deleted],
+            key=lambda change: change[0],
+        )
+        page = changes[:limit]
+        return JsonResponse({
+            'notes': [note for _, note, _ in page if note is not None],
+            'deleted': [pk for _, _, pk in page if pk is not None],
+            'version': page[-1][0] if page else since,
+            'has_more': len(changes) > limit,
+        })
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from yanote.db import configure_sqlite
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='configure_sqlite'
+        )
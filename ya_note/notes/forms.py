@@ -1,28 +1,93 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
 from pytils.translit import slugify
 
+from yanote.middleware import QueryCounter
+
 from .models import Note
+from .slugs import allocate_slugs
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+# Повторы нужны, только если slug успел занять параллельный запрос.
+MAX_SLUG_ATTEMPTS = 3
+
+
+def is_slug_conflict(note):
+    """
+    Проверяет после отката, занят ли slug заметки другой заметкой.
+
+    Текст IntegrityError зависит от СУБД, поэтому причина ошибки
+    определяется запросом, а не по сообщению.
+    """
+    return Note.objects.filter(slug=note.slug).exclude(pk=note.pk).exists()
 
 
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
+    # Сколько запросов ушло на попытки save(), откатившиеся из-за
+    # занятого slug, вместе с подбором нового slug.
+    retry_queries = 0
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
+        """
+        Подставляет slug из заголовка, если он не указан.
+
+        Уникальность здесь не проверяется: за неё отвечает ограничение
+        в БД, конфликт обрабатывается при сохранении.
+        """
+        slug = self.cleaned_data.get('slug')
+        self.slug_generated = not slug
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
+            max_length = Note._meta.get_field('slug').max_length
+            slug = slugify(self.cleaned_data.get('title', ''))[:max_length]
         return slug
+
+    def validate_unique(self):
+        """Slug не проверяется отдельным запросом, см. save()."""
+        exclude = self._get_validation_exclusions() | {'slug'}
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
+
+    def save(self, commit=True):
+        """
+        Сохраняет заметку, полагаясь на уникальный индекс по slug.
+
+        Сгенерированный slug при конфликте получает свободный суффикс
+        -2, -3, … одним запросом allocate_slugs; явно указанный
+        превращается в ошибку формы, а IntegrityError пробрасывается
+        дальше, чтобы представление показало форму снова.
+        """
+        note = super().save(commit=False)
+        if not commit:
+            return note
+        slug = note.slug
+        for attempt in range(1, MAX_SLUG_ATTEMPTS + 1):
+            counter = QueryCounter()
+            try:
+                with connection.execute_wrapper(counter):
+                    with transaction.atomic():
+                        note.save()
+                return note
+            except IntegrityError:
+                with connection.execute_wrapper(counter):
+                    conflict = is_slug_conflict(note)
+                    retry = (
+                        conflict
+                        and self.slug_generated
+                        and attempt < MAX_SLUG_ATTEMPTS
+                    )
+                    if retry:
+                        note.slug = ''
+                        allocate_slugs([note])
+                self.retry_queries += counter.count
+                if not retry:
+                    if conflict:
+                        self.add_error('slug', slug + WARNING)
+                    raise
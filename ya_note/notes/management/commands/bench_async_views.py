@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.loadtest import login, run_load
+
+MODES = {'sync': '0', 'async': '1'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки синхронных и '
+        'асинхронных версий списка заметок и страницы заметки под ASGI. '
+        'Каждый режим прогоняется в отдельном процессе на текущей БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'username', help='Автор заметок, от имени которого идут запросы.'
+        )
+        parser.add_argument(
+            '--clients', type=int, default=50,
+            help='Число одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Общее число запросов в прогоне.',
+        )
+        parser.add_argument(
+            '--mode', choices=MODES,
+            help='Прогнать только один режим и вывести результат в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+        for mode, flag in MODES.items():
+            child = subprocess.run(
+                [
+                    sys.executable, sys.argv[0], 'bench_async_views',
+                    options['username'],
+                    '--mode', mode,
+                    '--clients', str(options['clients']),
+                    '--requests', str(options['requests']),
+                ],
+                env={**os.environ, 'NOTES_ASYNC_VIEWS': flag},
+                capture_output=True, text=True,
+            )
+            if child.returncode:
+                raise CommandError(child.stderr)
+            result = json.loads(child.stdout.splitlines()[-1])
+            self.stdout.write(
+                f'{mode}: {result["rps"]:.0f} запросов/с, '
+                f'p50 {result["p50"]:.1f} мс, p99 {result["p99"]:.1f} мс, '
+                f'ошибок {result["errors"]} из {result["requests"]}'
+            )
+
+    def run_mode(self, options):
+        slugs = list(
+            Note.objects.filter(author__username=options['username'])
+            .values_list('slug', flat=True)[:10]
+        )
+        if not slugs:
+            raise CommandError('У пользователя нет заметок.')
+        paths = [reverse('notes:list')] + [
+            reverse('notes:detail', args=[slug]) for slug in slugs
+        ]
+        client, headers = login(options['username'])
+        app = get_asgi_application()
+        try:
+            asyncio.run(run_load(
+                app, paths, options['clients'], options['clients'], headers
+            ))
+            return asyncio.run(run_load(
+                app, paths, options['clients'], options['requests'], headers
+            ))
+        finally:
+            client.logout()
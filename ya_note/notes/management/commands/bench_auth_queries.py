@@ -0,0 +1,57 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Настройки до кэширования сессий и пользователей.
+DB_AUTH = override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов к БД и время ответа списка заметок '
+        'для авторизованного пользователя с сессиями и пользователями '
+        'из БД и из кэша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Пользователь для запросов.')
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Число запросов в каждом режиме.',
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.get(username=options['username'])
+        with DB_AUTH:
+            queries, elapsed = self.measure(user, options['requests'])
+        self.report('сессия и пользователь из БД', queries, elapsed)
+        queries, elapsed = self.measure(user, options['requests'])
+        self.report('сессия и пользователь из кэша', queries, elapsed)
+
+    @staticmethod
+    def measure(user, requests):
+        client = Client()
+        client.force_login(user)
+        url = reverse('notes:list')
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            for _ in range(requests):
+                client.get(url)
+            elapsed = perf_counter() - started
+        client.logout()
+        return len(queries) / requests, elapsed / requests
+
+    def report(self, mode, queries, elapsed):
+        self.stdout.write(
+            f'{mode}: {queries:.1f} запросов, {elapsed * 1000:.2f} мс '
+            'на запрос'
+        )
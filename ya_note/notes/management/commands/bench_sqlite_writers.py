@@ -0,0 +1,118 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from notes.models import Note
+
+PROFILES = ('dev', 'prod')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает одновременную запись заметок в SQLite с настройками '
+        'профилей dev и prod: ошибки блокировки, пропускную способность '
+        'и задержки. Каждый профиль работает с новой временной БД '
+        'в отдельном процессе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers', type=int, default=8,
+            help='Число потоков, пишущих одновременно.',
+        )
+        parser.add_argument(
+            '--writes', type=int, default=200,
+            help='Число транзакций на поток.',
+        )
+        parser.add_argument(
+            '--child', action='store_true',
+            help='Прогнать текущий профиль и вывести результат в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self.run_writers(options)))
+            return
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                child = subprocess.run(
+                    [
+                        sys.executable, sys.argv[0], 'bench_sqlite_writers',
+                        '--child',
+                        '--writers', str(options['writers']),
+                        '--writes', str(options['writes']),
+                    ],
+                    env={
+                        **os.environ,
+                        'DJANGO_SETTINGS_MODULE': f'yanote.settings.{profile}',
+                        'DJANGO_DATABASE_PATH': str(
+                            Path(directory) / 'db.sqlite3'
+                        ),
+                    },
+                    capture_output=True, text=True,
+                )
+            if child.returncode:
+                raise CommandError(child.stderr)
+            result = json.loads(child.stdout.splitlines()[-1])
+            self.stdout.write(
+                f'{profile}: ошибок блокировки {result["errors"]} из '
+                f'{result["writes"]}, {result["rate"]:.0f} записей/с, '
+                f'p50 {result["p50"]:.1f} мс, p99 {result["p99"]:.1f} мс'
+            )
+
+    def run_writers(self, options):
+        """
+        Каждая транзакция сначала читает, потом пишет — как проверка
+        перед созданием заметки. Так видны ошибки повышения блокировки.
+        """
+        call_command('migrate', verbosity=0)
+        author = get_user_model().objects.create_user(username='writer')
+        latencies, errors = [], []
+
+        def write(thread):
+            try:
+                for index in range(options['writes']):
+                    started = perf_counter()
+                    try:
+                        with transaction.atomic():
+                            Note.objects.filter(author=author).exists()
+                            Note(
+                                title=f'Заметка {thread}-{index}',
+                                text='Текст',
+                                slug=f'note-{thread}-{index}',
+                                author=author,
+                            ).save()
+                    except OperationalError:
+                        errors.append(thread)
+                    latencies.append(perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=write, args=(thread,))
+            for thread in range(options['writers'])
+        ]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+        return {
+            'writes': len(latencies),
+            'errors': len(errors),
+            'rate': (len(latencies) - len(errors)) / elapsed,
+            'p50': statistics.median(latencies) * 1000,
+            'p99': statistics.quantiles(latencies, n=100)[98] * 1000,
+        }
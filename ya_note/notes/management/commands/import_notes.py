@@ -0,0 +1,128 @@
+import csv
+import json
+import sys
+from itertools import islice
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes.models import ChangeCounter, Note
+from notes.slugs import MAX_SLUG_BATCH, allocate_slugs
+
+FORMATS = ('jsonl', 'csv')
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки из JSON Lines или CSV с полями title, text, '
+        'slug и author (username). Файл читается потоком, заметки '
+        'пишутся через bulk_create пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или - для stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--author',
+            help='Автор для строк, в которых он не указан.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if not 0 < batch_size <= MAX_SLUG_BATCH:
+            raise CommandError(
+                f'--batch-size должен быть от 1 до {MAX_SLUG_BATCH}.'
+            )
+        input_format = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'jsonl'
+        )
+        reader = read_csv if input_format == 'csv' else read_jsonl
+        self.authors = {}
+        self.default_author = options['author']
+        created = skipped = 0
+        started = perf_counter()
+        with self.open(options['path']) as stream:
+            for batch in batched(reader(stream), batch_size):
+                batch_created, batch_skipped = self.import_batch(batch)
+                created += batch_created
+                skipped += batch_skipped
+        elapsed = perf_counter() - started
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Создано заметок: {created}, пропущено: {skipped}, '
+            f'{elapsed:.1f} с, {rate:.0f} строк/с'
+        )
+
+    @staticmethod
+    def open(path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        return open(path, encoding='utf-8', newline='')
+
+    def import_batch(self, rows):
+        self.load_authors(
+            row.get('author') or self.default_author for row in rows
+        )
+        notes = []
+        for row in rows:
+            author_id = self.authors.get(
+                row.get('author') or self.default_author
+            )
+            if author_id is None:
+                self.stderr.write(f'Неизвестный автор: {row}')
+                continue
+            note = Note(
+                text=row.get('text', ''),
+                slug=row.get('slug') or '',
+                author_id=author_id,
+            )
+            if row.get('title'):
+                note.title = row['title']
+            notes.append(note)
+        with transaction.atomic():
+            conflicts = {id(note) for note in allocate_slugs(notes)}
+            for note in notes:
+                if id(note) in conflicts:
+                    self.stderr.write(f'Slug уже занят: {note.slug}')
+            notes = [note for note in notes if id(note) not in conflicts]
+            if notes:
+                for note, version in zip(
+                    notes, ChangeCounter.allocate(len(notes))
+                ):
+                    note.version = version
+            Note.objects.bulk_create(notes)
+        return len(notes), len(rows) - len(notes)
+
+    def load_authors(self, usernames):
+        """Достаёт неизвестных ещё авторов одним запросом."""
+        missing = {
+            username for username in usernames
+            if username and username not in self.authors
+        }
+        if not missing:
+            return
+        self.authors.update(dict.fromkeys(missing))
+        self.authors.update(
+            get_user_model().objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk')
+        )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу default в реплики из DATABASE_REPLICAS. '
+        'Только для SQLite: так реплики готовят для локальной проверки.'
+    )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            target = connections[alias]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            self.stdout.write(f'{alias}: скопировано из {DEFAULT_DB_ALIAS}')
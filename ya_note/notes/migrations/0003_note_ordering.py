@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='note',
+            options={'ordering': ('id',)},
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Внешнее содержимое: FTS5 хранит только индекс, текст берётся
+# из notes_note. Триггеры держат индекс в синхронизации, в том числе
+# при bulk_create. Миграция, пересоздающая notes_note на SQLite,
+# должна создать триггеры заново.
+CREATE_SQL = (
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, content='notes_note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+
+# SQLite пересоздаёт notes_note при добавлении version, и триггеры
+# индекса FTS5 из 0004_note_search пропадают вместе со старой таблицей.
+# Они создаются заново, индекс пересобирается.
+TRIGGERS_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+
+def recreate_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def fill_versions(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    ChangeCounter = apps.get_model('notes', 'ChangeCounter')
+    notes = Note.objects.using(schema_editor.connection.alias)
+    notes.update(version=F('id'))
+    ChangeCounter.objects.using(schema_editor.connection.alias).create(
+        pk=1, value=notes.aggregate(last=Max('id'))['last'] or 0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, recreate_search_triggers
+        ),
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeletedNote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'version'], name='note_author_version_idx'),
+        ),
+        migrations.AddField(
+            model_name='deletednote',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='deletednote',
+            index=models.Index(fields=['author', 'version'], name='deletednote_author_version_idx'),
+        ),
+        migrations.RunPython(fill_versions, migrations.RunPython.noop),
+        migrations.RunPython(
+            recreate_search_triggers, migrations.RunPython.noop
+        ),
+    ]
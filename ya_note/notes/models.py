@@ -1,7 +1,33 @@
+from contextvars import ContextVar
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from pytils.translit import slugify
 
+# pk заметок, следы которых delete_with_tombstones уже записал пачкой;
+# сигнал notes.signals.record_deleted_note их пропускает.
+tombstoned = ContextVar('tombstoned_notes', default=frozenset())
+
+
+class ChangeCounter(models.Model):
+    """
+    Счётчик версий изменений заметок, одна строка на всю базу.
+
+    UPDATE блокирует строку до конца транзакции, поэтому версии выдаются
+    в порядке фиксации транзакций и клиент синхронизации не пропустит
+    изменение с меньшей версией, зафиксированное позже.
+    """
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, count=1):
+        """Выдаёт count новых версий, возвращает range. Нужна транзакция."""
+        if not cls.objects.filter(pk=1).update(value=F('value') + count):
+            cls.objects.create(pk=1, value=count)
+        last = cls.objects.values_list('value', flat=True).get(pk=1)
+        return range(last - count + 1, last + 1)
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -25,7 +51,20 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    version = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = (
+            # Покрывает и выборку по author_id, поэтому у ForeignKey
+            # отдельный индекс отключён.
+            models.Index(fields=('author', 'id'), name='note_author_idx'),
+            models.Index(
+                fields=('author', 'version'), name='note_author_version_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -34,4 +73,48 @@ class Note(models.Model):
         if not self.slug:
             max_slug_length = self._meta.get_field('slug').max_length
             self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            self.version = ChangeCounter.allocate()[0]
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def delete_with_tombstones(cls, queryset):
+        """
+        Удаляет заметки, записывая следы DeletedNote одним запросом.
+
+        Следы остаются при любом удалении (см. notes.signals), но там
+        на каждую заметку уходит отдельная версия и вставка. Пачки
+        удаляются этим методом.
+        """
+        with transaction.atomic():
+            notes = list(queryset.values_list('pk', 'author_id'))
+            versions = ChangeCounter.allocate(len(notes)) if notes else ()
+            DeletedNote.objects.bulk_create(
+                DeletedNote(note_id=pk, author_id=author_id, version=version)
+                for (pk, author_id), version in zip(notes, versions)
+            )
+            token = tombstoned.set(frozenset(pk for pk, _ in notes))
+            try:
+                cls.objects.filter(pk__in=[pk for pk, _ in notes]).delete()
+            finally:
+                tombstoned.reset(token)
+        return notes
+
+
+class DeletedNote(models.Model):
+    """След удалённой заметки для дельта-синхронизации."""
+    note_id = models.BigIntegerField()
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    version = models.BigIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'version'),
+                name='deletednote_author_version_idx',
+            ),
+        )
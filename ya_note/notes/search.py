@@ -0,0 +1,44 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+WORD = re.compile(r'\w+')
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK = 'bm25(notes_note_fts, 10.0, 1.0)'
+
+
+def fts_query(query):
+    """
+    Переводит пользовательский запрос в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется как префикс, слова
+    объединяются через AND. Операторы FTS5 из ввода не проходят.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+def search_notes(queryset, query):
+    """
+    Фильтрует queryset заметок по запросу и сортирует по релевантности.
+
+    На SQLite используется индекс FTS5 из миграции 0004_note_search,
+    на остальных СУБД — поиск подстроки.
+    """
+    match = fts_query(query)
+    if not match:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(title__icontains=query) | Q(text__icontains=query)
+        )
+    return queryset.extra(
+        tables=['notes_note_fts'],
+        where=[
+            'notes_note_fts.rowid = notes_note.id',
+            'notes_note_fts MATCH %s',
+        ],
+        params=[match],
+        select={'rank': RANK},
+        order_by=['rank'],
+    )
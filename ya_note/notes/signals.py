@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import ChangeCounter, DeletedNote, Note, tombstoned
+
+
+@receiver(pre_delete, sender=Note)
+def record_deleted_note(sender, instance, origin, **kwargs):
+    """
+    Любое удаление заметки оставляет след для синхронизации.
+
+    Пропускаются заметки, следы которых уже записал
+    Note.delete_with_tombstones, и удаление вместе с автором:
+    каскад удалил бы и след.
+    """
+    if instance.pk in tombstoned.get():
+        return
+    if getattr(origin, 'model', type(origin)) is get_user_model():
+        return
+    DeletedNote.objects.create(
+        note_id=instance.pk,
+        author_id=instance.author_id,
+        version=ChangeCounter.allocate()[0],
+    )
@@ -0,0 +1,85 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+from .models import Note
+
+DEFAULT_SLUG = 'note'
+# Каждый slug пачки даёт условие в одном OR-запросе, а SQLite
+# ограничивает глубину выражения тысячей.
+MAX_SLUG_BATCH = 900
+# Длина самого длинного суффикса, на который рассчитан поиск занятых
+# slug: до -9999999.
+MAX_SUFFIX_LENGTH = 8
+
+
+def slug_max_length():
+    return Note._meta.get_field('slug').max_length
+
+
+def suffixed(slug, number):
+    suffix = f'-{number}'
+    return slug[:slug_max_length() - len(suffix)] + suffix
+
+
+def slug_range(base, max_length):
+    """
+    Условие на slug, среди которых ищутся занятые варианты base.
+
+    Диапазон [base, base + '.') содержит сам base и все base-N. Если base
+    так длинен, что suffixed() его обрезает, варианты начинаются только
+    с укороченного префикса, и берутся все slug с этим префиксом.
+    """
+    prefix_length = max_length - MAX_SUFFIX_LENGTH
+    if len(base) <= prefix_length:
+        return Q(slug__gte=base, slug__lt=base + '.')
+    prefix = base[:prefix_length]
+    # Slug состоят из ASCII-символов, все они меньше '\x7f'.
+    return Q(slug__gte=prefix, slug__lt=prefix + '\x7f')
+
+
+def allocate_slugs(notes):
+    """
+    Назначает slug пачке заметок за один запрос к БД.
+
+    Пустой slug генерируется из заголовка и при совпадении получает
+    суффикс -2, -3, …; явно указанный занятый slug не меняется,
+    такие заметки возвращаются списком конфликтов. Занятыми считаются
+    slug в БД, кроме собственного slug заметки, и slug, уже выданные
+    в пачке, поэтому запись пачки не нарушает уникальный индекс.
+    """
+    max_length = slug_max_length()
+    bases = [
+        (note, note.slug or slugify(note.title)[:max_length] or DEFAULT_SLUG)
+        for note in notes
+    ]
+    ranges = reduce(or_, (
+        slug_range(base, max_length) for base in {
+            base for _, base in bases
+        }
+    ), Q(pk__in=[]))
+    # Slug, которые сейчас записаны в БД, включая slug заметок пачки:
+    # заметка может оставить себе свой slug, но не занять чужой, даже
+    # если его владелец в этой же пачке переименовывается.
+    owners = dict(Note.objects.filter(ranges).values_list('slug', 'pk'))
+    assigned = set()
+
+    def is_free(slug, note):
+        return slug not in assigned and owners.get(slug, note.pk) == note.pk
+
+    conflicts = []
+    # Явные slug занимаются первыми, чтобы сгенерированные их обходили.
+    for note, base in sorted(bases, key=lambda pair: not pair[0].slug):
+        slug = base
+        if note.slug and not is_free(slug, note):
+            conflicts.append(note)
+            continue
+        number = 2
+        while not is_free(slug, note):
+            slug = suffixed(base, number)
+            number += 1
+        assigned.add(slug)
+        note.slug = slug
+    return conflicts
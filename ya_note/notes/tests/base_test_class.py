@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -36,3 +37,7 @@ class BaseTest(TestCase):
         cls.url_detail = reverse('notes:detail', args=[cls.note.slug])
         cls.url_edit = reverse('notes:edit', args=[cls.note.slug])
         cls.url_delete = reverse('notes:delete', args=[cls.note.slug])
+
+    def setUp(self):
+        # В кэше лежат сессии и пользователи прошлых тестов.
+        cache.clear()
@@ -0,0 +1,270 @@
+import json
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django.test import override_settings
+
+from notes.models import DeletedNote, Note
+from .base_test_class import BaseTest
+
+
+class TestNoteAPI(BaseTest):
+    """Тестирование JSON API заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url_api = reverse('notes:api')
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+        cls.foreign_note = Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=cls.reader
+        )
+
+    def post_batch(self, batch):
+        return self.author_client.post(
+            self.url_api, json.dumps(batch), content_type='application/json'
+        )
+
+    def test_anonymous_forbidden(self):
+        """Анонимный пользователь получает 403, а не редирект."""
+        response = self.client.get(self.url_api)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_list_only_own_notes(self):
+        """GET отдаёт только заметки автора."""
+        response = self.author_client.get(self.url_api)
+        self.assertEqual(
+            [note['id'] for note in response.json()['results']],
+            [self.note.pk],
+        )
+
+    def test_batch_operations(self):
+        """Пакет применяется целиком, ошибки сообщаются по элементам."""
+        second = Note.objects.create(
+            title='Вторая', text='Текст', slug='second', author=self.author
+        )
+        response = self.post_batch({
+            'create': [
+                {'title': self.note.title, 'text': 'Новая'},
+                {'title': 'Дубль', 'text': 'Текст', 'slug': 'foreign'},
+                {'title': 'Без текста'},
+            ],
+            'update': [
+                {'id': self.note.pk, 'text': 'Обновлено'},
+                {'id': self.foreign_note.pk, 'text': 'Взлом'},
+            ],
+            'delete': [second.pk, self.foreign_note.pk],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        result = response.json()
+        self.assertEqual(
+            [note['slug'] for note in result['created']], ['test-note-2']
+        )
+        self.assertEqual(
+            [item['index'] for item in result['errors']['create']], [2, 1]
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, 'Обновлено')
+        self.assertEqual(
+            [item['index'] for item in result['errors']['update']], [1]
+        )
+        self.assertEqual(result['deleted'], [second.pk])
+        self.assertEqual(
+            [item['index'] for item in result['errors']['delete']], [1]
+        )
+        self.foreign_note.refresh_from_db()
+        self.assertEqual(self.foreign_note.text, 'Текст')
+
+    def test_batch_slug_swap_reported_per_item(self):
+        """Обмен slug внутри пакета возвращает ошибки, а не 500."""
+        second = Note.objects.create(
+            title='Вторая', text='Текст', slug='second', author=self.author
+        )
+        response = self.post_batch({'update': [
+            {'id': self.note.pk, 'slug': second.slug},
+            {'id': second.pk, 'slug': self.note.slug},
+        ]})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        result = response.json()
+        self.assertEqual(result['updated'], [])
+        self.assertEqual(
+            [item['index'] for item in result['errors']['update']], [0, 1]
+        )
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {self.note.slug, second.slug, self.foreign_note.slug},
+        )
+
+    def test_batch_slug_released_in_same_batch_stays_taken(self):
+        """Slug, который освобождается в этом же пакете, ещё занят."""
+        second = Note.objects.create(
+            title='Вторая', text='Текст', slug='second', author=self.author
+        )
+        response = self.post_batch({
+            'create': [
+                {'title': 'Новая', 'text': 'Текст', 'slug': self.note.slug},
+            ],
+            'update': [
+                {'id': self.note.pk, 'slug': 'renamed'},
+                {'id': second.pk, 'slug': self.note.slug},
+            ],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        result = response.json()
+        self.assertEqual(result['created'], [])
+        self.assertEqual(
+            [item['index'] for item in result['errors']['create']], [0]
+        )
+        self.assertEqual(
+            [note['slug'] for note in result['updated']], ['renamed']
+        )
+        self.assertEqual(
+            [item['index'] for item in result['errors']['update']], [1]
+        )
+        second.refresh_from_db()
+        self.assertEqual(second.slug, 'second')
+
+    def test_batch_uses_one_slug_query_and_bulk_writes(self):
+        """Slug проверяются одним запросом, записи идут пачками."""
+        batch = {
+            'create': [
+                {'title': f'Заметка {index}', 'text': 'Текст'}
+                for index in range(20)
+            ],
+            'update': [{'id': self.note.pk, 'title': 'Новое название'}],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.post_batch(batch)
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(
+            sum(
+                sql.startswith('SELECT') and '"slug" >=' in sql
+                for sql in statements
+            ),
+            1,
+        )
+        for statement in ('INSERT INTO "notes_note"', 'UPDATE "notes_note"'):
+            self.assertEqual(
+                sum(sql.startswith(statement) for sql in statements), 1
+            )
+        self.assertEqual(Note.objects.filter(author=self.author).count(), 21)
+
+    def test_invalid_and_repeated_ids(self):
+        """Плохие и повторные id — ошибки элементов, а не 500."""
+        response = self.post_batch({
+            'update': [
+                {'id': 'abc', 'text': 'Текст'},
+                {'id': [1], 'text': 'Текст'},
+                {'id': self.note.pk, 'text': 'Обновлено'},
+                {'id': self.note.pk, 'text': 'Повтор'},
+            ],
+            'delete': [10 ** 30, True, self.foreign_note.pk],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        errors = response.json()['errors']
+        self.assertEqual(
+            [item['index'] for item in errors['update']], [0, 1, 3]
+        )
+        self.assertEqual(
+            [item['index'] for item in errors['delete']], [0, 1, 2]
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, 'Обновлено')
+
+    def test_broken_json(self):
+        """Некорректное тело запроса даёт 400."""
+        response = self.author_client.post(
+            self.url_api, 'not json', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class TestNoteChangesAPI(BaseTest):
+    """Тестирование дельта-синхронизации заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url_changes = reverse('notes:api-changes')
+        cls.author_client = cls.client_class()
+        cls.author_client.force_login(cls.author)
+
+    def get_changes(self, since):
+        return self.author_client.get(
+            self.url_changes, {'since': since}
+        ).json()
+
+    def test_changes_since_version(self):
+        """Отдаются только изменения после версии, включая удаления."""
+        since = self.get_changes(0)['version']
+        self.assertEqual(since, self.note.version)
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=self.reader
+        )
+        self.author_client.post(self.url_delete)
+        changes = self.get_changes(since)
+        self.assertEqual(
+            [note['id'] for note in changes['notes']], [other.pk]
+        )
+        self.assertEqual(changes['deleted'], [self.note.pk])
+        self.assertFalse(changes['has_more'])
+        self.assertEqual(self.get_changes(changes['version'])['notes'], [])
+
+    def test_versions_grow_on_update(self):
+        """Правка заметки даёт ей новую, большую версию."""
+        version = self.note.version
+        self.author_client.post(self.url_edit, data=self.form_data)
+        self.note.refresh_from_db()
+        self.assertGreater(self.note.version, version)
+
+    def test_every_deletion_leaves_tombstone(self):
+        """Следы остаются и после delete() мимо delete_with_tombstones."""
+        notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', slug=f'n-{index}',
+                author=self.author
+            )
+            for index in range(3)
+        ]
+        pks = sorted([self.note.pk] + [note.pk for note in notes])
+        notes[0].delete()
+        Note.objects.filter(pk__in=[notes[1].pk, notes[2].pk]).delete()
+        Note.delete_with_tombstones(Note.objects.filter(pk=self.note.pk))
+        self.assertEqual(
+            sorted(DeletedNote.objects.values_list('note_id', flat=True)),
+            pks,
+        )
+
+    def test_author_deletion_removes_notes_and_tombstones(self):
+        """Удаление автора не оставляет ни заметок, ни следов."""
+        author_id = self.author.pk
+        self.author.delete()
+        self.assertFalse(Note.objects.filter(author_id=author_id).exists())
+        self.assertFalse(DeletedNote.objects.exists())
+
+    @override_settings(NOTES_PER_PAGE=2)
+    def test_changes_paginated_by_version(self):
+        """Изменения отдаются порциями по порядку версий."""
+        for index in range(3):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', slug=f'n-{index}',
+                author=self.author
+            )
+        Note.delete_with_tombstones(Note.objects.filter(slug='n-0'))
+        seen, since, has_more = [], 0, True
+        while has_more:
+            changes = self.get_changes(since)
+            seen += [note['slug'] for note in changes['notes']]
+            seen += changes['deleted']
+            since, has_more = changes['version'], changes['has_more']
+        self.assertEqual(
+            seen, [self.note.slug, 'n-1', 'n-2',
+                   DeletedNote.objects.get().note_id]
+        )
@@ -1,7 +1,37 @@
+import importlib
+from http import HTTPStatus
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.template import engines
+from django.test import TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+from notes import urls as notes_urls
 from notes.forms import NoteForm
+from notes.models import Note
+from notes.views import NoteDetail
+from yanote import urls as project_urls
+from yanote.auth import CachedModelBackend, forget_user, user_version
+from yanote.metrics import registry
+from yanote.middleware import PIN_COOKIE, QueryBudgetExceeded
+from yanote.routers import ReplicaRouter
+from yanote.settings.prod import TEMPLATES as PRODUCTION_TEMPLATES
+from yanote.templating import preload_templates, template_names
 from .base_test_class import BaseTest
 
 
+def reload_urls():
+    importlib.reload(notes_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
 class TestNoteContent(BaseTest):
     """Тестирование содержимого страниц, связанных с заметками."""
 
@@ -32,3 +62,258 @@ class TestNoteContent(BaseTest):
             with self.subTest(url=url):
                 response = self.author_client.get(url)
                 self.assertIsInstance(response.context.get('form'), NoteForm)
+
+    @override_settings(NOTES_PER_PAGE=2)
+    def test_notes_list_keyset_pagination(self):
+        """Список заметок листается по id без загрузки текста."""
+        notes = [self.note] + Note.objects.bulk_create(
+            Note(title=f'Note {index}', text='Text', slug=f'note-{index}',
+                 author=self.author)
+            for index in range(3)
+        )
+        response = self.author_client.get(self.url_list)
+        first_page = response.context['object_list']
+        self.assertEqual(first_page, notes[:2])
+        self.assertIn('text', first_page[0].get_deferred_fields())
+        response = self.author_client.get(
+            self.url_list, {'after': response.context['next_after']}
+        )
+        self.assertEqual(response.context['object_list'], notes[2:])
+        self.assertIsNone(response.context['next_after'])
+
+    def test_notes_list_rejects_broken_cursor(self):
+        """Некорректный параметр after даёт ошибку 400."""
+        response = self.author_client.get(self.url_list, {'after': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_search_ranks_title_matches_first(self):
+        """Поиск находит заметки автора, совпадения в заголовке выше."""
+        in_text = Note.objects.create(
+            title='Покупки', text='Купить редиску', slug='shopping',
+            author=self.author
+        )
+        in_title = Note.objects.create(
+            title='Редиска', text='Посадить', slug='radish',
+            author=self.author
+        )
+        Note.objects.create(
+            title='Редиска', text='Чужая', slug='foreign', author=self.reader
+        )
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'редиск'}
+        )
+        self.assertEqual(
+            list(response.context['object_list']), [in_title, in_text]
+        )
+
+    def test_search_follows_note_updates(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        url = reverse('notes:search')
+        self.note.title = 'Огурцы'
+        self.note.save()
+        response = self.author_client.get(url, {'q': 'огурцы'})
+        self.assertEqual(list(response.context['object_list']), [self.note])
+        self.note.delete()
+        response = self.author_client.get(url, {'q': 'огурцы'})
+        self.assertEqual(list(response.context['object_list']), [])
+
+    def test_search_ignores_fts_syntax(self):
+        """Служебные символы FTS5 в запросе не приводят к ошибке."""
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': '"Test" AND (NOT*'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_server_timing_header(self):
+        """Число запросов и время в БД отдаются в заголовке Server-Timing."""
+        self.author_client.get(self.url_detail)
+        response = self.author_client.get(self.url_detail)
+        # Сессия и пользователь уже в кэше, из БД читается только заметка.
+        self.assertRegex(
+            response['Server-Timing'], r'^db;dur=[\d.]+;desc="1 queries"'
+        )
+
+    def test_query_budget_exceeded_raises(self):
+        """В тестах превышение бюджета представления роняет запрос."""
+        with patch.object(NoteDetail, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.author_client.get(self.url_detail)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_query_budget_exceeded_warns(self):
+        """В продакшене превышение бюджета только пишется в лог."""
+        with patch.object(NoteDetail, 'query_budget', 0):
+            with self.assertLogs('yanote.middleware', 'WARNING') as logs:
+                response = self.author_client.get(self.url_detail)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('NoteDetail', logs.output[0])
+
+    def test_session_and_user_cached(self):
+        """Повторный запрос списка не читает из БД сессию и пользователя."""
+        self.author_client.get(self.url_list)
+        with self.assertNumQueries(1):
+            self.author_client.get(self.url_list)
+
+    def test_user_cache_invalidated_on_save_and_logout(self):
+        """Изменённый пользователь перечитывается, вышедший забывается."""
+        self.author_client.get(self.url_list)
+        self.author.first_name = 'Автор'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        with self.assertNumQueries(2):
+            response = self.author_client.get(self.url_list)
+        self.assertEqual(response.context['user'].first_name, 'Автор')
+        client = self.client_class()
+        client.force_login(self.reader)
+        client.get(self.url_list)
+        version = user_version(self.reader.pk)
+        client.post(reverse('users:logout'))
+        self.assertNotEqual(user_version(self.reader.pk), version)
+
+    def test_async_user_lookup_uses_cache(self):
+        """aget_user читает пользователя из того же кэша, что и get_user."""
+        backend = CachedModelBackend()
+        backend.get_user(self.author.pk)
+        with self.assertNumQueries(0):
+            user = async_to_sync(backend.aget_user)(self.author.pk)
+        self.assertEqual(user, self.author)
+        forget_user(self.author.pk)
+        with self.assertNumQueries(1):
+            async_to_sync(backend.aget_user)(self.author.pk)
+        with self.assertNumQueries(0):
+            backend.get_user(self.author.pk)
+
+    def test_password_change_ends_cached_sessions(self):
+        """После смены пароля закэшированный пользователь не принимается."""
+        self.author_client.get(self.url_list)
+        self.author.set_password('new-pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        response = self.author_client.get(self.url_list)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_user_cache_version_changes_after_commit(self):
+        """Версия меняется только после фиксации транзакции."""
+        version = user_version(self.author.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.author.save()
+            self.assertEqual(user_version(self.author.pk), version)
+        self.assertEqual(len(callbacks), 1)
+
+    @override_settings(TEMPLATES=PRODUCTION_TEMPLATES)
+    def test_production_templates_preloaded(self):
+        """В продакшене все шаблоны компилируются при старте."""
+        names = set(template_names(PRODUCTION_TEMPLATES[0]['DIRS']))
+        self.assertEqual(preload_templates(), len(names))
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertEqual(set(loader.get_template_cache), names)
+
+    def test_metrics_by_url_name(self):
+        """Страница /metrics показывает время и запросы по имени URL."""
+        self.author_client.get(self.url_list)
+        registry.clear()
+        self.author_client.get(self.url_list)
+        content = self.client.get(reverse('metrics'), headers={
+            'Authorization': f'Bearer {settings.METRICS_TOKEN}'
+        }).content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{method="GET",view="notes:list"} 1',
+            content,
+        )
+        self.assertIn('db_queries_total{view="notes:list"} 1', content)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(NOTES_ASYNC_VIEWS=True)
+class TestAsyncNoteViews(BaseTest):
+    """Асинхронные версии списка заметок и страницы заметки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urls()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        reload_urls()
+
+    def setUp(self):
+        super().setUp()
+        self.async_client.force_login(self.author)
+
+    def test_async_views_selected_by_setting(self):
+        """Настройка NOTES_ASYNC_VIEWS подключает асинхронные версии."""
+        self.assertTrue(iscoroutinefunction(resolve(self.url_list).func))
+        self.assertTrue(iscoroutinefunction(resolve(self.url_detail).func))
+
+    async def test_async_notes_list(self):
+        """Список на асинхронном ORM листается по ключу."""
+        await self.async_client.get(self.url_list)
+        response = await self.async_client.get(self.url_list)
+        self.assertEqual(response.context['object_list'], [self.note])
+        self.assertIsNone(response.context['next_after'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        response = await self.async_client.get(self.url_list, {'after': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    async def test_async_note_detail(self):
+        """Чужая заметка недоступна, своя показывается."""
+        response = await self.async_client.get(self.url_detail)
+        self.assertEqual(response.context['note'], self.note)
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(self.url_detail)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_async_views_require_login(self):
+        """Аноним перенаправляется на страницу входа."""
+        await self.async_client.alogout()
+        response = await self.async_client.get(self.url_list)
+        self.assertRedirects(
+            response,
+            f'{reverse("users:login")}?next={self.url_list}',
+            fetch_redirect_response=False,
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaReads(TransactionTestCase):
+    """Список и страница заметки читают с реплики."""
+
+    databases = {DEFAULT_DB_ALIAS, 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        ReplicaRouter.health.checked.clear()
+        self.author = get_user_model().objects.create_user(
+            username='author', password='pass'
+        )
+        self.note = Note.objects.create(
+            title='Заметка', text='Текст', slug='note', author=self.author
+        )
+        call_command('sync_replicas', verbosity=0)
+        Note.objects.create(
+            title='Только в default', text='Текст', slug='fresh',
+            author=self.author,
+        )
+        self.client.force_login(self.author)
+
+    def test_reads_from_replica(self):
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(list(response.context['object_list']), [self.note])
+        response = self.client.get(reverse('notes:detail', args=['fresh']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_reads_pinned_to_default_after_write(self):
+        """После сохранения заметки автор читает из default."""
+        response = self.client.post(reverse('notes:add'), {
+            'title': 'Новая', 'text': 'Текст', 'slug': 'new'
+        })
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(
+            {note.slug for note in response.context['object_list']},
+            {'note', 'fresh', 'new'},
+        )
@@ -0,0 +1,11 @@
+from notes.models import Note
+from .base_test_class import BaseTest
+
+
+class TestNoteIndexes(BaseTest):
+    """Проверка планов запросов для горячих выборок заметок."""
+
+    def test_author_notes_use_index(self):
+        """Заметки автора читаются по индексу note_author_idx."""
+        plan = Note.objects.filter(author=self.author).explain()
+        self.assertIn('USING INDEX note_author_idx', plan)
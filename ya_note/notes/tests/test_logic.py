@@ -1,8 +1,20 @@
+import json
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
 from pytils.translit import slugify
+from django.core.management import call_command
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, connection, connections
+)
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from notes.forms import NoteForm
 from notes.models import Note
 from .base_test_class import BaseTest
 
@@ -133,3 +145,121 @@ class TestNoteLogic(BaseTest):
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), initial_count)
         self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_generated_slug_gets_suffix_on_conflict(self):
+        """Сгенерированный slug при совпадении получает суффикс."""
+        for expected_slug in ('test-note-2', 'test-note-3'):
+            with self.subTest(slug=expected_slug):
+                response = self.author_client.post(
+                    reverse('notes:add'),
+                    data={'title': self.note.title, 'text': 'Текст'}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+                self.assertTrue(
+                    Note.objects.filter(slug=expected_slug).exists()
+                )
+
+    def test_other_integrity_error_is_not_slug_conflict(self):
+        """Ошибка, не связанная с занятым slug, не попадает в поле slug."""
+        form = NoteForm(data=self.form_data)
+        self.assertTrue(form.is_valid())
+        form.instance.author = self.author
+        error = IntegrityError('NOT NULL constraint failed: notes_note.slug')
+        with patch.object(Note, 'save', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                form.save()
+        self.assertFalse(form.has_error('slug'))
+
+    def test_create_does_not_check_slug_with_select(self):
+        """Уникальность slug проверяет БД, без отдельного SELECT."""
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.post(reverse('notes:add'), data=self.form_data)
+        note_selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and '"notes_note"' in query['sql']
+        ]
+        self.assertEqual(note_selects, [])
+        self.assertTrue(
+            Note.objects.filter(slug=self.form_data['slug']).exists()
+        )
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_sqlite_pragmas_applied_to_new_connections(self):
+        """PRAGMA из настроек выполняются на новом соединении."""
+        new_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone(), (1234,))
+
+
+class TestImportNotes(BaseTest):
+    """Тестирование команды import_notes."""
+
+    def import_file(self, name, content, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / name
+            path.write_text(content, encoding='utf-8')
+            call_command(
+                'import_notes', str(path), stdout=StringIO(),
+                stderr=StringIO(), **options
+            )
+
+    def test_import_jsonl_resolves_slugs(self):
+        """Slug генерируются пачкой, занятые явные slug пропускаются."""
+        rows = (
+            {'title': self.note.title, 'text': 'a', 'author': 'author'},
+            {'title': self.note.title, 'text': 'b', 'author': 'author'},
+            {'title': 'X', 'text': 'c', 'slug': self.note.slug},
+            {'title': 'Y', 'text': 'd', 'author': 'nobody'},
+        )
+        self.import_file(
+            'notes.jsonl',
+            '\n'.join(json.dumps(row) for row in rows),
+            author='reader',
+        )
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {self.note.slug, 'test-note-2', 'test-note-3'},
+        )
+
+    def test_import_long_title_gets_truncated_suffix(self):
+        """Slug из длинного заголовка при совпадении укорачивается."""
+        title = 'a' * Note._meta.get_field('slug').max_length
+        Note.objects.create(title=title, text='a', author=self.author)
+        Note.objects.create(
+            title=title, text='b', slug=title[:-2] + '-2', author=self.author
+        )
+        self.import_file(
+            'notes.jsonl',
+            json.dumps({'title': title, 'text': 'c'}),
+            author='reader',
+        )
+        self.assertTrue(
+            Note.objects.filter(
+                slug=title[:-2] + '-3', author=self.reader
+            ).exists()
+        )
+
+    def test_import_csv_uses_one_slug_query_per_batch(self):
+        """На пачку приходится один запрос за slug и один INSERT."""
+        content = 'title,text\n' + ''.join(
+            f'Заметка {index},Текст\n' for index in range(10)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.import_file(
+                'notes.csv', content, author='author', batch_size=5
+            )
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(
+            sum(sql.startswith('INSERT') for sql in statements), 2
+        )
+        self.assertEqual(
+            sum(
+                sql.startswith('SELECT') and '"notes_note"' in sql
+                for sql in statements
+            ),
+            2,
+        )
+        self.assertEqual(Note.objects.filter(author=self.author).count(), 11)
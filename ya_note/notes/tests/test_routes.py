@@ -41,6 +41,7 @@ class TestRoutes(TestCase):
 
         cls.auth_user_urls = (
             reverse('notes:list'),
+            reverse('notes:search'),
             reverse('notes:add'),
             reverse('notes:success')
         )
@@ -1,15 +1,28 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
+if settings.NOTES_ASYNC_VIEWS:
+    notes_list, note_detail = views.AsyncNotesList, views.AsyncNoteDetail
+else:
+    notes_list, note_detail = views.NotesList, views.NoteDetail
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path('note/<slug:slug>/', note_detail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', notes_list.as_view(), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('api/notes/', api.NoteAPI.as_view(), name='api'),
+    path(
+        'api/notes/changes/',
+        api.NoteChangesAPI.as_view(),
+        name='api-changes'
+    ),
 ]
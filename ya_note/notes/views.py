@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError
+from django.shortcuts import aget_object_or_404
 from django.urls import reverse_lazy
 from django.views import generic
 
 from .forms import NoteForm
 from .models import Note
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,34 +31,136 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin для асинхронных представлений.
+
+    Пользователь загружается асинхронно и подставляется в request.user,
+    чтобы queryset и шаблоны не читали его из БД ещё раз.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(
+            request, *args, **kwargs
+        )
+
+
+class NoteFormMixin:
+    """
+    Показывает форму снова, если slug оказался занят при сохранении.
+
+    query_budget рассчитан на одну попытку сохранения. Запросы попыток,
+    откатившихся из-за slug, форма считает сама, и ответ сообщает
+    QueryBudgetMiddleware бюджет с их учётом.
+    """
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    def get_query_budget(self, form):
+        return self.query_budget + form.retry_queries
+
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        try:
+            response = super().form_valid(form)
+        except IntegrityError:
+            if not form.has_error('slug'):
+                raise
+            response = self.form_invalid(form)
+        response.query_budget = self.get_query_budget(form)
+        return response
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+    query_budget = 9
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+    query_budget = 10
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
+    query_budget = 10
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя.
+
+    Страницы листаются по ключу: параметр after — id последней
+    показанной заметки. Текст заметок в списке не нужен и не загружается.
+    """
     template_name = 'notes/list.html'
+    query_budget = 3
+    use_replica = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset().only('id', 'title', 'slug')
+        after = self.request.GET.get('after')
+        if after is None:
+            return queryset
+        try:
+            return queryset.filter(pk__gt=int(after))
+        except ValueError:
+            raise BadRequest('Некорректный параметр after.')
+
+    def get_context_data(self, **kwargs):
+        per_page = settings.NOTES_PER_PAGE
+        notes = list(self.object_list[:per_page + 1])
+        next_after = notes[per_page - 1].pk if len(notes) > per_page else None
+        return super().get_context_data(
+            object_list=notes[:per_page], next_after=next_after, **kwargs
+        )
+
+
+class AsyncNotesList(AsyncLoginRequiredMixin, NotesList):
+    """Список заметок на асинхронном ORM."""
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()[:settings.NOTES_PER_PAGE + 1]
+        self.object_list = [note async for note in queryset]
+        return self.render_to_response(self.get_context_data())
 
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    query_budget = 3
+    use_replica = True
+
+
+class AsyncNoteDetail(AsyncLoginRequiredMixin, NoteDetail):
+    """Заметка подробно на асинхронном ORM."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(
+            self.get_queryset(), slug=self.kwargs['slug']
+        )
+        return self.render_to_response(self.get_context_data())
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    query_budget = 3
+
+    def get_queryset(self):
+        return search_notes(
+            super().get_queryset().only('id', 'title', 'slug'),
+            self.request.GET.get('q', ''),
+        )[:settings.NOTES_PER_PAGE]
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            query=self.request.GET.get('q', ''), **kwargs
+        )
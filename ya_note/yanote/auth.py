@@ -0,0 +1,96 @@
+"""
+Бэкенд авторизации с пользователями в кэше Django.
+
+AuthenticationMiddleware на каждый запрос читает пользователя из БД.
+Здесь пользователь хранится в кэше USER_CACHE_TIMEOUT секунд под ключом
+с версией. Сохранение и удаление пользователя меняют версию после
+фиксации транзакции, выход — сразу. Если кэш общий для процессов
+(Redis, Memcached), смену пароля или блокировку сразу видят все
+воркеры. Размер кэша ограничивает его бэкенд: при переполнении он
+вытесняет записи, которые дольше всего не читались.
+"""
+from functools import partial
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+VERSION_KEY = 'auth:user-version:{pk}'
+USER_KEY = 'auth:user:{pk}:{version}'
+
+
+def user_version(user_id):
+    version = cache.get(VERSION_KEY.format(pk=user_id))
+    if version is None:
+        version = forget_user(user_id)
+    return version
+
+
+async def auser_version(user_id):
+    version = await cache.aget(VERSION_KEY.format(pk=user_id))
+    if version is None:
+        version = uuid4().hex
+        await cache.aset(VERSION_KEY.format(pk=user_id), version, None)
+    return version
+
+
+def forget_user(user_id):
+    """
+    Делает недоступной закэшированную запись пользователя.
+
+    Версия случайная: если ключ версии вытеснят из кэша, новая версия
+    не совпадёт со старой.
+    """
+    version = uuid4().hex
+    cache.set(VERSION_KEY.format(pk=user_id), version, None)
+    return version
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        """Кэш отдаёт каждому запросу свою копию пользователя."""
+        key = USER_KEY.format(pk=user_id, version=user_version(user_id))
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        """
+        То же для request.auser(): начиная с Django 5.2 асинхронные
+        представления получают пользователя здесь, минуя get_user().
+        """
+        key = USER_KEY.format(
+            pk=user_id, version=await auser_version(user_id)
+        )
+        user = await cache.aget(key)
+        if user is None:
+            user = await sync_to_async(super().get_user)(user_id)
+            if user is not None:
+                await cache.aset(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, using, **kwargs):
+    """
+    Версия меняется после фиксации: иначе параллельный запрос мог бы
+    прочитать старую строку и положить её в кэш под новой версией.
+    """
+    transaction.on_commit(partial(forget_user, instance.pk), using=using)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
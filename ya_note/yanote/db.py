@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Выполняет SQLITE_PRAGMAS на новом соединении.
+
+    PRAGMA идут мимо курсора Django, чтобы не попадать в счётчики
+    запросов и журнал отладки.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
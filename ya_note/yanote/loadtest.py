@@ -0,0 +1,99 @@
+"""
+Нагрузочный прогон ASGI-приложения внутри процесса.
+
+Клиенты — корутины, которые по очереди отправляют GET-запросы прямо в
+ASGI-приложение Django, без сети и веб-сервера. Синхронные и
+асинхронные представления обслуживает один и тот же ASGIHandler,
+поэтому разница в результатах — это разница самих представлений.
+"""
+import asyncio
+import statistics
+from http import HTTPStatus
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client
+
+
+async def send_request(app, path, headers):
+    """Отправляет один GET-запрос и возвращает код ответа."""
+    body_sent = False
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Обработчик ждёт отключения клиента, пока готовит ответ,
+            # а потом отменяет ожидание.
+            await asyncio.Future()
+        body_sent = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    path, _, query = path.partition('?')
+    await app({
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), *headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }, receive, send)
+    return status
+
+
+async def run_client(app, paths, count, headers, latencies, errors):
+    for index in range(count):
+        started = perf_counter()
+        status = await send_request(app, paths[index % len(paths)], headers)
+        latencies.append(perf_counter() - started)
+        if status != HTTPStatus.OK:
+            errors.append(status)
+
+
+async def run_load(app, paths, clients, requests, headers=()):
+    """
+    Прогоняет requests запросов силами clients одновременных клиентов.
+
+    Возвращает число запросов и ошибок, запросы в секунду и
+    задержки p50/p99 в миллисекундах.
+    """
+    latencies, errors = [], []
+    started = perf_counter()
+    await asyncio.gather(*(
+        run_client(
+            app, paths, requests // clients, headers, latencies, errors
+        )
+        for _ in range(clients)
+    ))
+    elapsed = perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': statistics.quantiles(latencies, n=100)[98] * 1000,
+    }
+
+
+def login(username):
+    """
+    Открывает сессию пользователя и возвращает её клиент и заголовки.
+
+    После прогона сессию нужно закрыть вызовом client.logout().
+    """
+    client = Client()
+    client.force_login(get_user_model().objects.get(username=username))
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.session.session_key}'
+    return client, [(b'cookie', cookie.encode())]
@@ -0,0 +1,303 @@
+"""
+Метрики процесса в текстовом формате Prometheus.
+
+Каждый поток пишет в собственный словарь, поэтому при записи блокировки
+не нужны: общий замок берётся только при появлении и завершении потока
+и при сборе значений. Словарь завершившегося потока прибавляется к общим
+значениям процесса и удаляется: под ASGI каждый запрос выполняется
+в новом потоке. Если задан METRICS_DIR, процесс не реже раза в
+METRICS_FLUSH_INTERVAL секунд сохраняет свои значения в
+<pid>-<случайная часть>.json, а /metrics складывает файлы живых
+воркеров с архивом, куда переносятся значения завершившихся.
+"""
+import fcntl
+import hmac
+import json
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS = {
+    'http_request_duration_seconds': (
+        'histogram', 'Время обработки запроса по имени URL.'
+    ),
+    'db_queries_total': ('counter', 'SQL-запросы по имени URL.'),
+    'db_duration_seconds_total': (
+        'counter', 'Время выполнения SQL-запросов по имени URL.'
+    ),
+    'template_render_duration_seconds': (
+        'histogram', 'Время рендеринга шаблонов по имени URL.'
+    ),
+}
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+# Имена не начинаются с pid, поэтому live_files их пропускает.
+ARCHIVE_NAME = 'archive.json'
+ARCHIVE_LOCK_NAME = 'archive.lock'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ShardHolder:
+    """Держит словарь потока в threading.local и умирает вместе с потоком."""
+    __slots__ = ('samples', '__weakref__')
+
+
+class Registry:
+    """Счётчики и гистограммы одного процесса."""
+
+    def __init__(self):
+        self.local = threading.local()
+        # Слияние может запустить сборщик мусора в потоке, который уже
+        # держит замок.
+        self.lock = threading.RLock()
+        self.shards = {}
+        self.retired = defaultdict(float)
+        self.flushed = 0
+        self.file_pid = None
+        self.file_name = None
+
+    def shard(self):
+        try:
+            return self.local.holder.samples
+        except AttributeError:
+            holder = self.local.holder = ShardHolder()
+            samples = holder.samples = defaultdict(float)
+            with self.lock:
+                self.shards[id(samples)] = samples
+            weakref.finalize(holder, self.retire, samples)
+            return samples
+
+    def retire(self, samples):
+        """Переносит значения завершившегося потока в общие."""
+        with self.lock:
+            self.shards.pop(id(samples), None)
+            for key, value in samples.items():
+                self.retired[key] += value
+
+    def inc(self, name, value=1, **labels):
+        self.shard()[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        samples = self.shard()
+        labels = tuple(sorted(labels.items()))
+        for bound in buckets:
+            if value <= bound:
+                samples[f'{name}_bucket', labels + (('le', str(bound)),)] += 1
+        samples[f'{name}_bucket', labels + (('le', '+Inf'),)] += 1
+        samples[f'{name}_sum', labels] += value
+        samples[f'{name}_count', labels] += 1
+
+    def collect(self):
+        """Сумма значений всех потоков процесса."""
+        with self.lock:
+            shards = list(self.shards.values())
+            totals = self.retired.copy()
+        for shard in shards:
+            for key, value in shard.copy().items():
+                totals[key] += value
+        return totals
+
+    def clear(self):
+        with self.lock:
+            for shard in self.shards.values():
+                shard.clear()
+            self.retired.clear()
+
+    def own_file_name(self):
+        """
+        Имя файла процесса: pid и случайная часть.
+
+        Случайная часть отличает процесс от прежнего владельца того же
+        pid; после fork воркер получает собственное имя.
+        """
+        pid = os.getpid()
+        if self.file_pid != pid:
+            self.file_pid = pid
+            self.file_name = f'{pid}-{uuid4().hex}.json'
+        return self.file_name
+
+    def flush(self, directory):
+        """Атомарно записывает значения процесса в общий каталог."""
+        directory = Path(directory)
+        path = directory / self.own_file_name()
+        temporary = directory / f'{os.getpid()}.{threading.get_ident()}.tmp'
+        temporary.write_text(json.dumps([
+            [name, labels, value]
+            for (name, labels), value in self.collect().items()
+        ]))
+        os.replace(temporary, path)
+
+    def maybe_flush(self):
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if directory is None or now - self.flushed < (
+            settings.METRICS_FLUSH_INTERVAL
+        ):
+            return
+        self.flushed = now
+        self.flush(directory)
+
+    def aggregate(self, directory):
+        """Сумма значений живых процессов и архива завершившихся."""
+        self.flush(directory)
+        totals = defaultdict(float)
+        for path in [Path(directory) / ARCHIVE_NAME, *live_files(directory)]:
+            add_samples(totals, path)
+        return totals
+
+
+registry = Registry()
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def add_samples(totals, path):
+    """Прибавляет к totals значения из файла; нечитаемый файл пропускается."""
+    try:
+        samples = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return
+    for name, labels, value in samples:
+        totals[name, tuple(map(tuple, labels))] += value
+
+
+def archive_files(directory, paths):
+    """
+    Переносит значения завершившихся процессов в ARCHIVE_NAME.
+
+    Так же поступает mark_process_dead в prometheus_client: счётчики
+    и гистограммы не убывают при перезапуске воркера, и Prometheus
+    не видит сброса. Архив обновляется под блокировкой, чтобы
+    параллельные запросы /metrics не сложили один файл дважды.
+    """
+    directory = Path(directory)
+    with open(directory / ARCHIVE_LOCK_NAME, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Файлы, которые уже перенёс другой процесс, исчезли.
+        paths = [path for path in paths if path.exists()]
+        if not paths:
+            return
+        totals = defaultdict(float)
+        for path in [directory / ARCHIVE_NAME, *paths]:
+            add_samples(totals, path)
+        temporary = directory / f'{ARCHIVE_NAME}.tmp'
+        temporary.write_text(json.dumps([
+            [name, labels, value]
+            for (name, labels), value in totals.items()
+        ]))
+        os.replace(temporary, directory / ARCHIVE_NAME)
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+def live_files(directory):
+    """
+    Файлы живых процессов; остальные переносятся в архив.
+
+    Из нескольких файлов с одним pid живому процессу принадлежит
+    самый свежий: остальные оставил прежний владелец этого pid.
+    """
+    by_pid = defaultdict(list)
+    for path in Path(directory).glob('*.json'):
+        try:
+            pid = int(path.stem.partition('-')[0])
+            by_pid[pid].append((path.stat().st_mtime, path))
+        except (OSError, ValueError):
+            continue
+    live = []
+    dead = []
+    for pid, files in by_pid.items():
+        files.sort()
+        alive = process_alive(pid)
+        dead += [path for _, path in (files[:-1] if alive else files)]
+        if alive:
+            live.append(files[-1][1])
+    if dead:
+        archive_files(directory, dead)
+    return live
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def sample_order(item):
+    (name, labels), _ = item
+    le = dict(labels).get('le')
+    return (
+        name,
+        tuple(label for label in labels if label[0] != 'le'),
+        float(le) if le is not None else 0,
+    )
+
+
+def render(samples):
+    """Текстовый формат экспозиции Prometheus."""
+    lines = []
+    for family, (kind, description) in METRICS.items():
+        names = (
+            {family + suffix for suffix in HISTOGRAM_SUFFIXES}
+            if kind == 'histogram' else {family}
+        )
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for (name, labels), value in sorted(
+            samples.items(), key=sample_order
+        ):
+            if name in names:
+                lines.append(
+                    f'{name}{format_labels(labels)} {format_value(value)}'
+                )
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Внутренняя страница метрик.
+
+    Доступна только с заголовком Authorization: Bearer <METRICS_TOKEN>,
+    без токена в настройках её нет. Адрес клиента не проверяется:
+    за обратным прокси все запросы приходят с 127.0.0.1.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(),
+        f'Bearer {token}'.encode(),
+    ):
+        raise Http404
+    if settings.METRICS_DIR is None:
+        samples = registry.collect()
+    else:
+        samples = registry.aggregate(settings.METRICS_DIR)
+    return HttpResponse(render(samples), content_type=CONTENT_TYPE)
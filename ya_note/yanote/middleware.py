@@ -0,0 +1,181 @@
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from .metrics import registry
+from .routers import RequestState, request_state
+
+PIN_COOKIE = 'pin_primary'
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper: считает запросы и время в БД."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Считает SQL-запросы и время в БД на каждый запрос.
+
+    Итог отдаётся в заголовке Server-Timing. Если у класса представления
+    объявлен атрибут query_budget и запросов больше, при
+    QUERY_BUDGET_STRICT выбрасывается QueryBudgetExceeded (для тестов),
+    иначе пишется предупреждение в лог. Бюджет, зависящий от хода
+    запроса, представление передаёт атрибутом query_budget ответа.
+
+    Работает и под WSGI, и под ASGI: обёртка ставится на соединения
+    того же контекста, в котором асинхронный ORM выполняет запросы.
+    Считаются запросы ко всем базам, включая реплики.
+    """
+
+    def process_request(self, request):
+        request.query_counter = QueryCounter()
+        request.query_started = perf_counter()
+        for connection in connections.all():
+            connection.execute_wrappers.append(request.query_counter)
+
+    def process_response(self, request, response):
+        counter = getattr(request, 'query_counter', None)
+        if counter is None:
+            return response
+        for connection in connections.all():
+            connection.execute_wrappers.remove(counter)
+        total = perf_counter() - request.query_started
+        if settings.QUERY_BUDGET_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={counter.duration * 1000:.1f};'
+                f'desc="{counter.count} queries", '
+                f'total;dur={total * 1000:.1f}'
+            )
+        self.check_budget(request, response, counter.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', view_func)
+        request.query_budget = getattr(view_class, 'query_budget', None)
+        request.query_budget_view = view_class.__name__
+
+    @staticmethod
+    def check_budget(request, response, count):
+        budget = getattr(
+            response, 'query_budget', getattr(request, 'query_budget', None)
+        )
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{request.query_budget_view} ({request.method} '
+            f'{request.path}): {count} SQL-запросов при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Записывает в реестр метрик время ответа, запросы к БД и время
+    рендеринга шаблона, с меткой — именем URL.
+
+    Должен стоять в MIDDLEWARE раньше QueryBudgetMiddleware, чтобы
+    видеть его счётчик запросов.
+    """
+
+    def process_request(self, request):
+        request.metrics_started = perf_counter()
+
+    def process_response(self, request, response):
+        view = self.view_name(request)
+        registry.observe(
+            'http_request_duration_seconds',
+            perf_counter() - request.metrics_started,
+            view=view,
+            method=request.method,
+        )
+        counter = getattr(request, 'query_counter', None)
+        if counter is not None:
+            registry.inc('db_queries_total', counter.count, view=view)
+            registry.inc(
+                'db_duration_seconds_total', counter.duration, view=view
+            )
+        registry.maybe_flush()
+        return response
+
+    def process_template_response(self, request, response):
+        """Ответы из кэша уже отрисованы и в метрику не попадают."""
+        if response.is_rendered:
+            return response
+        started = perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: registry.observe(
+                'template_render_duration_seconds',
+                perf_counter() - started,
+                view=self.view_name(request),
+            )
+        )
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = request.resolver_match
+        return match.view_name if match is not None else 'unresolved'
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    """
+    Включает чтение с реплик для GET-запросов к представлениям
+    с атрибутом use_replica (см. yanote.routers).
+
+    Если запрос что-то записал в базу, ответ ставит cookie, и следующие
+    REPLICA_PIN_SECONDS секунд этот браузер читает только из default:
+    автор сразу видит свою запись, даже если реплика отстаёт.
+    Должен стоять в MIDDLEWARE раньше SessionMiddleware, чтобы
+    заметить и сохранение сессии.
+    """
+
+    def process_request(self, request):
+        request.replica_state = RequestState()
+        request_state.set(request.replica_state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', view_func)
+        request.replica_state.use_replica = bool(
+            settings.DATABASE_REPLICAS
+            and request.method in ('GET', 'HEAD')
+            and getattr(view_class, 'use_replica', False)
+            and PIN_COOKIE not in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        state = getattr(request, 'replica_state', None)
+        if state is None:
+            return response
+        request_state.set(None)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
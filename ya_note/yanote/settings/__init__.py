@@ -0,0 +1,10 @@
+"""
+Настройки по профилям.
+
+base — общие, dev — для разработки, test — для тестов, prod — для
+продакшена под WSGI, prod_asgi — под ASGI (асинхронные представления
+работают только под ним). Профиль выбирается через
+DJANGO_SETTINGS_MODULE, например yanote.settings.prod; сам
+yanote.settings — это dev.
+"""
+from .dev import *  # noqa: F401,F403
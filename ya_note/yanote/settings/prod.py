@@ -0,0 +1,54 @@
+import os
+
+from yanote.templating import CACHED_LOADERS
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES
+
+# Без DEBUG соединения не копят выполненные запросы в памяти.
+DEBUG = False
+
+# Ключ и хосты задаются окружением. Без ключа Django откажется
+# подписывать сессии, без хостов — отвечать на запросы.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+ALLOWED_HOSTS = list(filter(
+    None, os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+))
+
+# Соединения живут между запросами; под ASGI используется профиль
+# prod_asgi, где CONN_MAX_AGE = 0. С IMMEDIATE транзакция сразу берёт блокировку
+# на запись и ждёт её busy_timeout, а не падает с «database is locked»
+# при попытке повысить блокировку чтения.
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    }
+}
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Шаблоны разбираются один раз на процесс и все сразу при старте:
+# ошибка в любом из них не даёт запустить приложение.
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': CACHED_LOADERS,
+        },
+    },
+]
+PRELOAD_TEMPLATES = True
@@ -0,0 +1,20 @@
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES
+
+# Превышение бюджета запросов в тестах — ошибка.
+QUERY_BUDGET_STRICT = True
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+METRICS_TOKEN = 'test-metrics-token'
+
+# Вторая база для тестов чтения с реплик. Роутер её не использует,
+# пока тест не укажет DATABASE_REPLICAS = ['replica'].
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+    },
+}
+DATABASE_REPLICAS = []
@@ -4,9 +4,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('', include('notes.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 auth_urls = ([